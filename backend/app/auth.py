@@ -0,0 +1,219 @@
+# app/auth.py
+#
+# Stateless bearer tokens: HS256-signed JWTs issued by /login/ and
+# /users/google/. Checking one is an HMAC and a JSON parse, with no session
+# store, so any node that shares AUTH_SECRET accepts any other node's
+# tokens. The user behind a token is kept in a small LRU (by subject), so
+# an authenticated request normally doesn't query the database either.
+
+import os
+import hmac
+import json
+import time
+import uuid
+import base64
+import hashlib
+import logging
+import secrets
+from collections import OrderedDict
+from typing import Optional
+from fastapi import Depends, Header, HTTPException
+from app import crud_async, schemas
+from app.crud_async import AnySession
+from app.database import get_session
+
+logger = logging.getLogger(__name__)
+
+ACCESS_TOKEN_TTL = int(os.getenv("ACCESS_TOKEN_TTL", "900"))
+REFRESH_TOKEN_TTL = int(os.getenv("REFRESH_TOKEN_TTL", str(30 * 24 * 3600)))
+# Booking endpoints need a token; false also accepts a bare user_id (legacy clients)
+AUTH_REQUIRED = os.getenv("AUTH_REQUIRED", "true").lower() == "true"
+
+# Example values that must never sign real tokens
+PLACEHOLDER_SECRETS = {"change-me", "changeme", "change_me", "secret", "password", "test", "dev", "default", "example"}
+
+
+def load_secrets(value: str, required: bool = AUTH_REQUIRED) -> list:
+    """
+    Signing secret(s) from AUTH_SECRET, comma separated: the first signs,
+    all verify (for rotation). While auth is required it must be set to
+    something other than a placeholder; otherwise an unset secret makes
+    each process sign with its own random key.
+    """
+    keys = [s.strip() for s in value.split(",") if s.strip()]
+    placeholders = [s for s in keys if s.lower() in PLACEHOLDER_SECRETS]
+    if required and not keys:
+        raise RuntimeError("AUTH_SECRET is not set; set it to a long random value, the same on every instance")
+    if placeholders and required:
+        raise RuntimeError("AUTH_SECRET is a placeholder; set it to a long random value")
+    if placeholders:
+        logger.warning("AUTH_SECRET is a placeholder; anyone can forge tokens")
+    if not keys:
+        logger.warning("AUTH_SECRET is not set; tokens are only valid on this process")
+        return [secrets.token_bytes(32)]
+    return [s.encode() for s in keys]
+
+
+# Every node must share it (see load_secrets)
+AUTH_SECRETS = load_secrets(os.getenv("AUTH_SECRET", ""))
+# Resolved users kept in memory, and for how long (bounds how late a
+# deactivated account notices)
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "4096"))
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "300"))
+
+_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _sign(signing_input: bytes, secret: bytes) -> bytes:
+    return _b64encode(hmac.new(secret, signing_input, hashlib.sha256).digest())
+
+
+def create_token(subject: str, token_type: str, ttl: int) -> str:
+    now = int(time.time())
+    claims = {"sub": subject, "typ": token_type, "iat": now, "exp": now + ttl, "jti": uuid.uuid4().hex}
+    signing_input = _HEADER + b"." + _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return (signing_input + b"." + _sign(signing_input, AUTH_SECRETS[0])).decode()
+
+
+def verify_token(token: str, token_type: str) -> dict:
+    """
+    The claims of a valid, unexpired token of token_type; 401 otherwise.
+    """
+    try:
+        signing_input, signature = token.encode().rsplit(b".", 1)
+        header, payload = signing_input.split(b".")
+        if header != _HEADER or not any(hmac.compare_digest(signature, _sign(signing_input, s)) for s in AUTH_SECRETS):
+            raise ValueError("bad signature")
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, UnicodeError):
+        raise _unauthorized("Invalid token")
+    if claims.get("typ") != token_type or not isinstance(claims.get("sub"), str):
+        raise _unauthorized("Invalid token")
+    if claims.get("exp", 0) <= time.time():
+        raise _unauthorized("Token expired")
+    return claims
+
+
+def issue_tokens(user) -> dict:
+    return {
+        "access_token": create_token(user.id, "access", ACCESS_TOKEN_TTL),
+        "refresh_token": create_token(user.id, "refresh", REFRESH_TOKEN_TTL),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_TTL,
+    }
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+class UserCache:
+    """
+    LRU of subject -> schemas.User, each entry valid for ttl seconds.
+    """
+
+    def __init__(self, max_entries: int = AUTH_USER_CACHE_SIZE, ttl: int = AUTH_USER_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str):
+        entry = self._data.get(subject)
+        if entry is None or entry[1] < time.monotonic():
+            self.misses += 1
+            return None
+        self._data.move_to_end(subject)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, subject: str, user: schemas.User):
+        self._data[subject] = (user, time.monotonic() + self.ttl)
+        self._data.move_to_end(subject)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._data), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserCache()
+
+
+async def _resolve(db: AnySession, subject: str) -> schemas.User:
+    user = user_cache.get(subject)
+    if user is None:
+        db_user = await crud_async.get_user_by_id(db, subject)
+        if db_user is None:
+            raise _unauthorized("Unknown user")
+        user = schemas.User.model_validate(db_user, from_attributes=True)
+        user_cache.set(subject, user)
+    if not user.is_active:
+        raise _unauthorized("Inactive user")
+    return user
+
+
+async def optional_user(
+    authorization: Optional[str] = Header(None),
+    db: AnySession = Depends(get_session),
+) -> Optional[schemas.User]:
+    """
+    Dependency: the user of a valid "Authorization: Bearer" access token,
+    or None when the request has no token. A bad token is always a 401.
+    """
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise _unauthorized("Expected a Bearer token")
+    return await _resolve(db, verify_token(token.strip(), "access")["sub"])
+
+
+def user_id_for(user: Optional[schemas.User], user_id: Optional[str] = None) -> str:
+    """
+    The user a request acts for: the token's user (403 if it names someone
+    else), or with AUTH_REQUIRED off and no token, the user_id it names.
+    """
+    if user is not None:
+        if user_id is not None and user_id != user.id:
+            raise HTTPException(403, detail="Token does not belong to this user")
+        return user.id
+    if AUTH_REQUIRED:
+        raise _unauthorized("Not authenticated")
+    if user_id is None:
+        raise HTTPException(422, detail="Provide user_id.")
+    return user_id
+
+
+def owner_id(user: Optional[schemas.User]) -> Optional[str]:
+    """
+    Whose bookings a cancel/delete may touch: the token's user, or with
+    AUTH_REQUIRED off and no token, anyone's (None).
+    """
+    if user is not None:
+        return user.id
+    if AUTH_REQUIRED:
+        raise _unauthorized("Not authenticated")
+    return None
+
+
+async def refresh(db: AnySession, refresh_token: str) -> dict:
+    """
+    A new token pair for a valid refresh token. The user is re-read from
+    the database, so a deactivated account can't keep refreshing.
+    """
+    subject = verify_token(refresh_token, "refresh")["sub"]
+    db_user = await crud_async.get_user_by_id(db, subject)
+    if db_user is None or not db_user.is_active:
+        raise _unauthorized("Unknown or inactive user")
+    user_cache.set(subject, schemas.User.model_validate(db_user, from_attributes=True))
+    return issue_tokens(db_user)
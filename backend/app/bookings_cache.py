@@ -0,0 +1,82 @@
+# app/bookings_cache.py
+#
+# Read cache for GET /bookings/{user_id}. Each cached page holds the
+# serialized schemas.Booking list plus its ETag and next cursor, under a
+# key that includes the user's bookings_version. Every booking write bumps
+# that column in its own transaction, so once it commits no worker (and no
+# node) can serve a page cached before it: the version is read from the
+# database on each request, a primary-key lookup instead of the list query.
+#
+# Uses the same backend as the search cache (SEARCH_CACHE_BACKEND).
+
+import os
+import hashlib
+from sqlalchemy import update
+from app.cache import MemoryCache, RedisCache, make_key, SEARCH_CACHE_BACKEND
+from app.models import User
+from app.serialization import dumps
+
+BOOKINGS_CACHE_TTL = int(os.getenv("BOOKINGS_CACHE_TTL", "300"))
+BOOKINGS_CACHE_MAX_ENTRIES = int(os.getenv("BOOKINGS_CACHE_MAX_ENTRIES", "4096"))
+
+_cache = None
+
+
+def get_bookings_cache():
+    global _cache
+    if _cache is None:
+        if SEARCH_CACHE_BACKEND == "redis":
+            _cache = RedisCache()
+            _cache.prefix = "vactionres:bookings:"
+        else:
+            # separate from the search cache so pages don't evict search results
+            _cache = MemoryCache(BOOKINGS_CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def etag(body) -> str:
+    digest = hashlib.sha256(dumps(body)).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, current: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return current in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def page_key(user_id: str, version: int | None, skip: int, limit: int, cursor: str | None) -> str | None:
+    """
+    Cache key for one page at the user's bookings_version, or None when
+    there is no version to key on (no such user row) and the page must not
+    be cached. Read the version before the bookings, so a page read while
+    a write lands is stored under the old version and never served after it.
+    """
+    if version is None:
+        return None
+    return make_key("page", user_id, version, skip, limit, cursor)
+
+
+async def get_page(key: str | None):
+    """
+    The cached {"body", "etag", "next_cursor"} for key, or None.
+    """
+    if key is None:
+        return None
+    entry = await get_bookings_cache().get(key)
+    return entry[0] if entry is not None else None
+
+
+async def set_page(key: str | None, page: dict):
+    if key is not None:
+        await get_bookings_cache().set(key, page, BOOKINGS_CACHE_TTL)
+
+
+def mark_changed(db, user_id: str):
+    """
+    Bump user_id's bookings_version in the caller's transaction; called by
+    the crud functions that write bookings, before they commit.
+    """
+    db.execute(update(User).where(User.id == user_id).values(bookings_version=User.bookings_version + 1))
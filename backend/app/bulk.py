@@ -0,0 +1,127 @@
+# app/bulk.py
+
+import os
+import io
+import csv
+import json
+import codecs
+from fastapi import Request, HTTPException
+from pydantic import ValidationError
+
+# Rows per transaction when importing inventory
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+# Row errors echoed back per request (the total is always reported)
+BULK_MAX_REPORTED_ERRORS = 1000
+
+
+async def _lines(request: Request):
+    """
+    Yield the decoded lines of the request body as it streams in.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()  # chunks may split a character
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+def _csv_value(value: str):
+    # empty cells are missing values; list/dict columns are JSON-encoded
+    if value == "":
+        return None
+    if value[:1] in "[{":
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+async def iter_rows(request: Request):
+    """
+    Yield raw row dicts from a JSON array, NDJSON or CSV body,
+    chosen by Content-Type. NDJSON and CSV are read as they stream in.
+    A row that can't be parsed is yielded as the exception instead.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+
+    if content_type == "application/json":
+        try:
+            rows = await request.json()
+        except ValueError:
+            raise HTTPException(400, detail="Body is not valid JSON.")
+        if not isinstance(rows, list):
+            raise HTTPException(400, detail="Expected a JSON array of records.")
+        for row in rows:
+            yield row
+
+    elif content_type in ("application/x-ndjson", "application/jsonl"):
+        async for line in _lines(request):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield e
+
+    elif content_type == "text/csv":
+        header = None
+        async for line in _lines(request):
+            if not line.strip():
+                continue
+            values = next(csv.reader(io.StringIO(line)))
+            if header is None:
+                header = [h.strip() for h in values]
+                continue
+            yield {k: _csv_value(v) for k, v in zip(header, values)}
+
+    else:
+        raise HTTPException(415, detail="Use application/json, application/x-ndjson or text/csv.")
+
+
+async def import_rows(request: Request, schema, key_fields: tuple, upsert):
+    """
+    Validate each row against schema and upsert valid rows in batches of
+    BULK_BATCH_SIZE via `await upsert(batch)` -> (inserted, updated).
+    Invalid rows are skipped and reported by 1-based row number.
+    """
+    result = {"received": 0, "inserted": 0, "updated": 0, "error_count": 0, "errors": []}
+    batch = []
+
+    async def flush():
+        inserted, updated = await upsert(batch)
+        result["inserted"] += inserted
+        result["updated"] += updated
+        batch.clear()
+
+    async for row in iter_rows(request):
+        result["received"] += 1
+        try:
+            if isinstance(row, Exception):
+                raise ValueError(f"Unparseable row: {row}")
+            if not isinstance(row, dict):
+                raise ValueError("Row must be an object.")
+            record = schema(**row)
+            missing = [f for f in key_fields if getattr(record, f) in (None, "")]
+            if missing:
+                raise ValueError(f"Missing natural key field(s): {', '.join(missing)}")
+        except (ValidationError, ValueError) as e:
+            result["error_count"] += 1
+            if len(result["errors"]) < BULK_MAX_REPORTED_ERRORS:
+                if isinstance(e, ValidationError):
+                    detail = [{"loc": err["loc"], "msg": err["msg"]} for err in e.errors()]
+                else:
+                    detail = str(e)
+                result["errors"].append({"row": result["received"], "errors": detail})
+            continue
+
+        batch.append(record)
+        if len(batch) >= BULK_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return result
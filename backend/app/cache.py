@@ -0,0 +1,195 @@
+# app/cache.py
+
+import os
+import json
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# "memory" (per process) or "redis" (shared between workers/nodes)
+SEARCH_CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory")
+SEARCH_CACHE_URL = os.getenv("SEARCH_CACHE_URL", "redis://localhost:6379/0")
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+
+# Seconds each provider's results stay fresh
+CACHE_TTLS = {
+    "flights": int(os.getenv("FLIGHTS_CACHE_TTL", "900")),
+    "hotels": int(os.getenv("HOTELS_CACHE_TTL", "1800")),
+    # OpenWeather recomputes its 5-day forecast every 3 hours
+    "weather": int(os.getenv("WEATHER_CACHE_TTL", "10800")),
+}
+
+# Seconds past freshness a result may still be served while it is
+# refreshed in the background (stale-while-revalidate); 0 disables it
+STALE_TTLS = {
+    "flights": int(os.getenv("FLIGHTS_STALE_TTL", "900")),
+    "hotels": int(os.getenv("HOTELS_STALE_TTL", "1800")),
+    "weather": int(os.getenv("WEATHER_STALE_TTL", "3600")),
+}
+
+# Expire weather at the next WEATHER_CACHE_TTL boundary (00:00, 03:00, ...
+# UTC with the default) instead of a fixed time after the fetch, so a cached
+# forecast is never older than the provider's current one; the margin gives
+# the provider time to publish
+WEATHER_CACHE_ALIGNED = os.getenv("WEATHER_CACHE_ALIGNED", "true").lower() == "true"
+WEATHER_CACHE_ALIGN_MARGIN = int(os.getenv("WEATHER_CACHE_ALIGN_MARGIN", "300"))
+
+
+def cache_ttl(provider: str) -> int:
+    """
+    Seconds a result fetched now stays fresh.
+    """
+    ttl = CACHE_TTLS[provider]
+    if provider == "weather" and WEATHER_CACHE_ALIGNED:
+        now = time.time() - WEATHER_CACHE_ALIGN_MARGIN
+        return int(ttl - now % ttl) + 1
+    return ttl
+
+
+
+def make_key(provider: str, *parts) -> str:
+    """
+    Build a cache key from already-normalized query parts,
+    e.g. make_key("flights", "TLV", "JFK", "2025-06-22", "", "USD").
+    """
+    return provider + ":" + "|".join("" if p is None else str(p) for p in parts)
+
+
+class MemoryCache:
+    """
+    In-process TTL cache with LRU eviction once max_entries is reached.
+
+    get() returns (value, seconds_left) where seconds_left <= 0 means the
+    value is stale but still inside its stale window, or None on a miss.
+    """
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str):
+        entry = self._data.get(key)
+        now = time.monotonic()
+        if entry is None or entry[2] < now:
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        seconds_left = entry[1] - now
+        if seconds_left > 0:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry[0], seconds_left
+
+    async def set(self, key: str, value, ttl: int, stale_ttl: int = 0):
+        now = time.monotonic()
+        self._data[key] = (value, now + ttl, now + ttl + stale_ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RedisCache:
+    """
+    Shared cache on any Redis-compatible server. Values are stored as JSON
+    and expired by the server; a Redis outage degrades to cache misses.
+    """
+
+    prefix = "vactionres:search:"
+
+    def __init__(self, url: str = SEARCH_CACHE_URL):
+        import redis.asyncio as redis  # optional dependency
+
+        self.url = url
+        self._redis = redis.from_url(url)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key: str):
+        try:
+            raw = await self._redis.get(self.prefix + key)
+        except Exception as e:
+            logger.warning("search cache get failed: %s", e)
+            self.errors += 1
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        entry = json.loads(raw)
+        seconds_left = entry["fresh_until"] - time.time()
+        if seconds_left > 0:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry["value"], seconds_left
+
+    async def set(self, key: str, value, ttl: int, stale_ttl: int = 0):
+        entry = {"value": value, "fresh_until": time.time() + ttl}
+        try:
+            await self._redis.set(self.prefix + key, json.dumps(entry), ex=ttl + stale_ttl)
+        except Exception as e:
+            logger.warning("search cache set failed: %s", e)
+            self.errors += 1
+
+    async def clear(self):
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            await self._redis.delete(key)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "url": self.url,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+_cache = None
+
+
+def get_cache():
+    """
+    Return the configured search cache, creating it on first use.
+    """
+    global _cache
+    if _cache is None:
+        if SEARCH_CACHE_BACKEND == "redis":
+            _cache = RedisCache()
+        else:
+            _cache = MemoryCache()
+    return _cache
+
+
+def set_cache(cache):
+    """
+    Swap the search cache backend (e.g. for a different store at startup).
+    """
+    global _cache
+    _cache = cache
@@ -0,0 +1,288 @@
+# app/catalog.py
+#
+# Ingestion of search results into the Flight/Hotel tables. Every offer a
+# search returns gets an offer_id (a hash of what identifies it, price
+# included) and is written to the catalog, in one batch with whatever other
+# searches are writing at the same time, before the results are handed out.
+# Booking can then reference a search result by offer_id, on any worker,
+# instead of the client re-posting it.
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import date
+from fastapi import HTTPException
+from app import crud, crud_async
+from app.models import Flight, Hotel
+
+logger = logging.getLogger(__name__)
+
+# Offers whose write failed (database unavailable) are retried every
+# CATALOG_FLUSH_INTERVAL seconds; inserts go in batches of CATALOG_BATCH_SIZE
+CATALOG_FLUSH_INTERVAL = float(os.getenv("CATALOG_FLUSH_INTERVAL", "2"))
+CATALOG_BATCH_SIZE = int(os.getenv("CATALOG_BATCH_SIZE", "500"))
+# Offers kept queued while the database is unavailable; beyond this they're dropped
+CATALOG_MAX_PENDING = int(os.getenv("CATALOG_MAX_PENDING", "20000"))
+
+
+def offer_hash(fields: dict) -> str:
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def flight_row(flight: dict, origin: str, destination: str, departure_date: str, return_date: str = None):
+    """
+    Flight table row for one search_flights result, or None when the
+    offer has no usable price.
+    """
+    price = _number(flight.get("price"))
+    if price is None:
+        return None
+    row = {
+        "departure_id": origin,
+        "arrival_id": destination,
+        "outbound_date": date.fromisoformat(departure_date),
+        # one-way searches are stored like the frontend did: return = outbound
+        "return_date": date.fromisoformat(return_date or departure_date),
+        "airline": flight.get("airline"),
+        "flight_number": flight.get("flight_number"),
+        "departure_time": flight.get("departure_time"),
+        "arrival_time": flight.get("arrival_time"),
+        "price": price,
+    }
+    row["offer_hash"] = offer_hash(row)
+    row["total_duration"] = _number(flight.get("total_duration"))
+    row["google_flights_url"] = flight.get("google_flights_url")
+    return row
+
+
+def hotel_row(prop: dict, query: str, ci: str, co: str, currency: str):
+    """
+    Hotel table row for one search_hotels property, or None when the
+    offer has no usable price.
+    """
+    price = _number((prop.get("rate_per_night") or {}).get("extracted_lowest"))
+    if price is None or not prop.get("name"):
+        return None
+    row = {
+        "name": prop["name"],
+        "location": query,
+        "check_in_date": date.fromisoformat(ci),
+        "check_out_date": date.fromisoformat(co),
+        "price": round(price),
+    }
+    row["offer_hash"] = offer_hash({**row, "currency": currency})
+    row.update(
+        available_rooms=None,  # inventory lives with the provider
+        link=prop.get("link"),
+        overall_rating=_number(prop.get("overall_rating")),
+        reviews=_number(prop.get("reviews")),
+        amenities=prop.get("amenities"),
+        images=prop.get("images"),
+    )
+    return row
+
+
+class CatalogWriter:
+    """
+    Queue of offers waiting to be written, deduplicated by offer_hash.
+    Concurrent writes share a flush, so a burst of searches costs one
+    insert per batch rather than one per search.
+    """
+
+    def __init__(self):
+        self._pending = {Flight: {}, Hotel: {}}
+        # the batch a flush is writing: no longer pending, not yet committed
+        self._inflight = {Flight: {}, Hotel: {}}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self.queued = 0
+        self.inserted = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def _size(self) -> int:
+        return sum(len(rows) for rows in self._pending.values())
+
+    def add(self, model, rows: list[dict]):
+        pending = self._pending[model]
+        for row in rows:
+            if row["offer_hash"] in pending or row["offer_hash"] in self._inflight[model]:
+                continue
+            if self._size() >= CATALOG_MAX_PENDING:
+                self.dropped += 1
+                continue
+            pending[row["offer_hash"]] = row
+            self.queued += 1
+        if self._size() >= CATALOG_BATCH_SIZE:
+            self._wakeup.set()
+
+    def is_pending(self, model, offer_id: str) -> bool:
+        """
+        Whether offer_id is queued or being written, i.e. not committed yet.
+        """
+        return offer_id in self._pending[model] or offer_id in self._inflight[model]
+
+    async def flush(self):
+        """
+        Write everything queued so far. Flushes run one at a time, so once
+        this returns, offers that another flush was writing are committed
+        too. On failure the offers go back in the queue for the next flush.
+        """
+        async with self._flush_lock:
+            for model in list(self._pending):
+                pending = self._pending[model]
+                if not pending:
+                    continue
+                self._pending[model] = {}
+                self._inflight[model] = pending
+                rows = list(pending.values())
+                try:
+                    for start in range(0, len(rows), CATALOG_BATCH_SIZE):
+                        batch = rows[start:start + CATALOG_BATCH_SIZE]
+                        self.inserted += await crud_async.run_in_new_session(crud.ingest_offers, model, batch)
+                    self.flushes += 1
+                except Exception as e:
+                    self.failures += 1
+                    logger.warning("catalog flush of %d %s offers failed: %s", len(rows), model.__tablename__, e)
+                    self._pending[model] = {**pending, **self._pending[model]}
+                    raise
+                finally:
+                    self._inflight[model] = {}
+
+    async def write(self, model, rows: list[dict]):
+        """
+        Queue rows and wait until they are committed (by this flush or one
+        already under way). If the database is unavailable the rows stay
+        queued for run() to retry and this returns anyway, so searches
+        don't fail with it.
+        """
+        self.add(model, rows)
+        if not any(self.is_pending(model, row["offer_hash"]) for row in rows):
+            return
+        try:
+            await self.flush()
+        except Exception:
+            pass  # already logged; retried by run()
+
+    async def run(self):
+        """
+        Background loop: retry queued offers on an interval or when the
+        queue fills up.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), CATALOG_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                pass  # already logged; retried on the next pass
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._size(),
+            "writing": sum(len(rows) for rows in self._inflight.values()),
+            "queued": self.queued,
+            "inserted": self.inserted,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
+
+
+catalog_writer = CatalogWriter()
+
+
+async def ingest_flights(flights: list[dict], origin: str, destination: str, departure_date: str, return_date: str = None):
+    """
+    Tag each result with its offer_id and write it to the catalog, so
+    the offer_id can be booked on any worker as soon as it's returned.
+    """
+    rows = []
+    for flight in flights:
+        row = flight_row(flight, origin, destination, departure_date, return_date)
+        flight["offer_id"] = row["offer_hash"] if row else None
+        if row:
+            rows.append(row)
+    await catalog_writer.write(Flight, rows)
+    return flights
+
+
+async def ingest_hotels(properties: list[dict], query: str, ci: str, co: str, currency: str):
+    rows = []
+    for prop in properties:
+        row = hotel_row(prop, query, ci, co, currency)
+        prop["offer_id"] = row["offer_hash"] if row else None
+        if row:
+            rows.append(row)
+    await catalog_writer.write(Hotel, rows)
+    return properties
+
+
+async def resolve_offer(db: crud_async.AnySession, model, offer_id: str):
+    """
+    Catalog row for an offer_id from a search response. Offers are
+    committed before they're returned; one whose write failed and is still
+    queued here is written first, one being written right now waited for.
+    """
+    if catalog_writer.is_pending(model, offer_id):
+        await catalog_writer.flush()
+    row = await crud_async.get_offer(db, model, offer_id)
+    if row is None:
+        raise HTTPException(404, detail="Unknown or expired offer_id; search again.")
+    return row
+
+
+def _flight_result(flight: Flight) -> dict:
+    return {
+        "total_duration": flight.total_duration,
+        "price": flight.price,
+        "airline": flight.airline,
+        "flight_number": flight.flight_number,
+        "departure_time": flight.departure_time,
+        "arrival_time": flight.arrival_time,
+        "google_flights_url": flight.google_flights_url,
+        "offer_id": flight.offer_hash,
+    }
+
+
+def _hotel_result(hotel: Hotel) -> dict:
+    return {
+        "name": hotel.name,
+        "location": hotel.location,
+        "link": hotel.link,
+        "overall_rating": hotel.overall_rating,
+        "reviews": hotel.reviews,
+        "amenities": hotel.amenities or [],
+        "images": hotel.images or [],
+        "rate_per_night": {"extracted_lowest": hotel.price},
+        "offer_id": hotel.offer_hash,
+    }
+
+
+async def find_flights(origin: str, destination: str, departure_date: str, return_date: str = None):
+    """
+    Previously ingested offers for a flight search, cheapest first.
+    """
+    flights = await crud_async.run_in_new_session(
+        crud.find_flight_offers, origin, destination,
+        date.fromisoformat(departure_date), date.fromisoformat(return_date or departure_date),
+    )
+    return [_flight_result(f) for f in flights]
+
+
+async def find_hotels(query: str, ci: str, co: str):
+    hotels = await crud_async.run_in_new_session(
+        crud.find_hotel_offers, query, date.fromisoformat(ci), date.fromisoformat(co),
+    )
+    return [_hotel_result(h) for h in hotels]
@@ -0,0 +1,115 @@
+# app/compression.py
+#
+# Compresses responses with brotli or gzip, whichever the client prefers in
+# Accept-Encoding. Only whole (non-streaming) bodies of at least
+# COMPRESSION_MIN_SIZE bytes are compressed; streamed responses (NDJSON,
+# SSE) pass through untouched so each event still reaches the client as
+# soon as it is sent.
+
+import os
+import gzip
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli  # optional; without it only gzip is offered
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as they are
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# 1 (fastest) - 9 (smallest)
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# 0 (fastest) - 11 (smallest); 11 is far too slow for per-request use
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+
+
+def _encodings() -> list[str]:
+    # in order of preference when the client weighs them equally
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """
+    The supported encoding with the highest q-value in accept_encoding,
+    or None.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in _encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return "content-encoding" not in headers and content_type.startswith(COMPRESSIBLE_TYPES) \
+        and content_type != "text/event-stream"
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware: negotiated brotli/gzip for whole response bodies.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        started = False
+
+        async def send_compressed(message):
+            nonlocal start, started
+            if message["type"] == "http.response.start":
+                start = message  # held until the body shows whether to compress
+                return
+            if message["type"] != "http.response.body" or started:
+                await send(message)
+                return
+
+            started = True
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if _compressible(headers):
+                headers.add_vary_header("Accept-Encoding")
+                if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                    body = compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    etag = headers.get("etag")
+                    if etag and not etag.startswith("W/"):
+                        # the compressed bytes differ, so the tag is only weakly valid
+                        headers["ETag"] = "W/" + etag
+                    message = {**message, "body": body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
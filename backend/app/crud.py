@@ -1,18 +1,30 @@
 from sqlalchemy.orm import Session ,joinedload
-from passlib.context import CryptContext
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, insert, update, tuple_, cast, func, exists, and_, or_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import metrics
+from app.security import pwd_context
+from app.pagination import keyset_page
+from app.bookings_cache import mark_changed
+from app.serialization import FLIGHT, HOTEL
 from app.models import User, Hotel, Flight, Booking
-from app.schemas import UserCreate, GoogleUserCreate, HotelCreate, FlightCreate, BookingCreate , HotelUpdate, FlightUpdate
+from app.schemas import UserCreate, GoogleUserCreate, HotelCreate, FlightCreate, BookingCreate , HotelUpdate, FlightUpdate, FlightQuery, HotelQuery
 from datetime import date
+import sys
 import uuid
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 def get_user(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
-def create_user(db: Session, user: UserCreate):
-    # hash with bcrypt
-    hashed_pw = pwd_context.hash(user.password)
+def get_user_by_id(db: Session, user_id: str):
+    return db.get(User, user_id)
+
+def create_user(db: Session, user: UserCreate, hashed_pw: str = None):
+    # hash with bcrypt (callers on the event loop pass a hash made off-loop)
+    if hashed_pw is None:
+        hashed_pw = pwd_context.hash(user.password)
     
     # Generate a unique ID for regular users (you can use UUID or a simple counter)
     user_id = str(uuid.uuid4())
@@ -43,7 +55,12 @@ def create_google_user(db: Session, user: GoogleUserCreate):
         is_active=True
     )
     db.add(db_user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # email (or name) already belongs to another account
+        db.rollback()
+        return None
     db.refresh(db_user)
     return db_user
 
@@ -57,11 +74,19 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
+def update_password_hash(db: Session, user: User, hashed_pw: str):
+    user.hashed_password = hashed_pw
+    db.commit()
+    return user
+
 
 
 # Hotel CRUD
-def get_hotels(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(Hotel).offset(skip).limit(limit).all()
+def get_hotels(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, columns: list = None):
+    # cheapest first; keyset on (price, id). With columns, returns rows of
+    # just those columns instead of Hotel objects
+    query = db.query(*columns) if columns else db.query(Hotel)
+    return keyset_page(query, (Hotel.price, Hotel.id), cursor, skip, limit)
 
 def create_hotel(db: Session, hotel: HotelCreate):
     data = hotel.dict(exclude_none=True)
@@ -84,8 +109,10 @@ def update_hotel(db: Session, hotel_id: int, hotel_data: HotelUpdate):
 
 
 # Flight CRUD
-def get_flights(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(Flight).offset(skip).limit(limit).all()
+def get_flights(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, columns: list = None):
+    # cheapest first; keyset on (price, id)
+    query = db.query(*columns) if columns else db.query(Flight)
+    return keyset_page(query, (Flight.price, Flight.id), cursor, skip, limit)
 
 def create_flight(db: Session, flight: FlightCreate):
     db_flight = Flight(**flight.dict())
@@ -105,53 +132,303 @@ def update_flight(db: Session, flight_id: int, flight_data: FlightUpdate):
     return db_flight
 
 
+# Bulk import
+def _bulk_upsert(db: Session, model, key_columns: tuple, rows: list[dict]):
+    """
+    Insert-or-update rows matched on key_columns in one transaction:
+    one SELECT for the existing keys, then one executemany UPDATE and one
+    executemany INSERT. Returns (inserted, updated).
+    """
+    names = [c.key for c in key_columns]
+    by_key = {tuple(row[n] for n in names): row for row in rows}  # last row wins
+
+    existing = dict(
+        (tuple(r[:-1]), r[-1])
+        for r in db.execute(
+            select(*key_columns, model.id).where(tuple_(*key_columns).in_(list(by_key)))
+        )
+    )
+    updates = [{**row, "id": existing[key]} for key, row in by_key.items() if key in existing]
+    inserts = [row for key, row in by_key.items() if key not in existing]
+
+    if updates:
+        db.execute(update(model), updates)
+    if inserts:
+        db.execute(insert(model), inserts)
+    db.commit()
+    return len(inserts), len(updates)
+
+def bulk_upsert_flights(db: Session, flights: list[FlightCreate]):
+    # natural key: airline + flight_number + outbound_date
+    return _bulk_upsert(
+        db, Flight, (Flight.airline, Flight.flight_number, Flight.outbound_date),
+        [f.dict() for f in flights],
+    )
+
+def bulk_upsert_hotels(db: Session, hotels: list[HotelCreate]):
+    # natural key: name + location + check_in_date
+    return _bulk_upsert(
+        db, Hotel, (Hotel.name, Hotel.location, Hotel.check_in_date),
+        [h.dict() for h in hotels],
+    )
+
+
+# Search-ingested offers (deduplicated on offer_hash)
+def ingest_offers(db: Session, model, rows: list[dict]):
+    """
+    Insert offers whose offer_hash isn't in the catalog yet; known offers
+    are left as they are. Returns the number of new rows.
+    """
+    if not rows:
+        return 0
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # single round trip; also safe against another worker ingesting the same offer
+        dialect_insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        stmt = dialect_insert(model).on_conflict_do_nothing(index_elements=["offer_hash"])
+        inserted = db.connection().execute(stmt, rows).rowcount
+    else:
+        known = set(db.scalars(
+            select(model.offer_hash).where(model.offer_hash.in_([r["offer_hash"] for r in rows]))
+        ))
+        new_rows = [r for r in rows if r["offer_hash"] not in known]
+        if new_rows:
+            db.execute(insert(model), new_rows)
+        inserted = len(new_rows)
+    db.commit()
+    return max(inserted, 0)
+
+def get_offer(db: Session, model, offer_hash: str):
+    return db.query(model).filter(model.offer_hash == offer_hash).first()
+
+def find_flight_offers(db: Session, origin: str, destination: str, outbound_date: date, return_date: date):
+    return (
+        db.query(Flight)
+          .filter(Flight.departure_id == origin,
+                  Flight.arrival_id == destination,
+                  Flight.outbound_date == outbound_date,
+                  Flight.return_date == return_date,
+                  Flight.offer_hash != None)
+          .order_by(Flight.price, Flight.id)
+          .all()
+    )
+
+def find_hotel_offers(db: Session, location: str, check_in_date: date, check_out_date: date):
+    return (
+        db.query(Hotel)
+          .filter(Hotel.location == location,
+                  Hotel.check_in_date == check_in_date,
+                  Hotel.check_out_date == check_out_date,
+                  Hotel.offer_hash != None)
+          .order_by(Hotel.price, Hotel.id)
+          .all()
+    )
+
+
+# Catalog queries: each sort is (columns, descending); the columns double as
+# the keyset cursor and the trailing id keeps the order total
+FLIGHT_SORTS = {
+    "price": ((Flight.price, Flight.id), False),
+    "-price": ((Flight.price, Flight.id), True),
+    "departure": ((Flight.outbound_date, Flight.price, Flight.id), False),
+    "duration": ((Flight.total_duration, Flight.id), False),
+}
+HOTEL_SORTS = {
+    "price": ((Hotel.price, Hotel.id), False),
+    "-price": ((Hotel.price, Hotel.id), True),
+    "rating": ((Hotel.overall_rating, Hotel.id), True),
+    "reviews": ((Hotel.reviews, Hotel.id), True),
+}
+
+def _has_amenities(db: Session, amenities: list[str]):
+    if db.get_bind().dialect.name == "postgresql":
+        # answered from the GIN index on (amenities::jsonb), see migrations
+        return cast(Hotel.amenities, JSONB).contains(amenities)
+    conditions = []
+    for amenity in amenities:
+        values = func.json_each(Hotel.amenities).table_valued("value")
+        conditions.append(exists(select(1).select_from(values).where(values.c.value == amenity)))
+    return and_(*conditions)
+
+def query_flights(db: Session, filters: FlightQuery, sort: str = "price", limit: int = 10, cursor: str = None,
+                  select_columns: list = None):
+    columns, descending = FLIGHT_SORTS[sort]
+    query = db.query(*select_columns) if select_columns else db.query(Flight)
+    if filters.origin:
+        query = query.filter(Flight.departure_id == filters.origin.upper())
+    if filters.destination:
+        query = query.filter(Flight.arrival_id == filters.destination.upper())
+    if filters.departure_from:
+        query = query.filter(Flight.outbound_date >= filters.departure_from)
+    if filters.departure_to:
+        query = query.filter(Flight.outbound_date <= filters.departure_to)
+    if filters.return_from:
+        query = query.filter(Flight.return_date >= filters.return_from)
+    if filters.return_to:
+        query = query.filter(Flight.return_date <= filters.return_to)
+    if filters.min_price is not None:
+        query = query.filter(Flight.price >= filters.min_price)
+    if filters.max_price is not None:
+        query = query.filter(Flight.price <= filters.max_price)
+    if filters.airlines:
+        query = query.filter(Flight.airline.in_(filters.airlines))
+    if filters.max_duration is not None:
+        query = query.filter(Flight.total_duration <= filters.max_duration)
+    # rows with no value for the sort key can't be paged by keyset; leave them out
+    query = query.filter(columns[0] != None)
+    return keyset_page(query, columns, cursor, limit=limit, descending=descending)
+
+def query_hotels(db: Session, filters: HotelQuery, sort: str = "price", limit: int = 10, cursor: str = None,
+                 select_columns: list = None):
+    columns, descending = HOTEL_SORTS[sort]
+    query = db.query(*select_columns) if select_columns else db.query(Hotel)
+    if filters.location:
+        query = query.filter(Hotel.location == filters.location)
+    if filters.check_in_from:
+        query = query.filter(Hotel.check_in_date >= filters.check_in_from)
+    if filters.check_in_to:
+        query = query.filter(Hotel.check_in_date <= filters.check_in_to)
+    if filters.check_out_from:
+        query = query.filter(Hotel.check_out_date >= filters.check_out_from)
+    if filters.check_out_to:
+        query = query.filter(Hotel.check_out_date <= filters.check_out_to)
+    if filters.min_price is not None:
+        query = query.filter(Hotel.price >= filters.min_price)
+    if filters.max_price is not None:
+        query = query.filter(Hotel.price <= filters.max_price)
+    if filters.min_rating is not None:
+        query = query.filter(Hotel.overall_rating >= filters.min_rating)
+    if filters.min_reviews is not None:
+        query = query.filter(Hotel.reviews >= filters.min_reviews)
+    if filters.amenities:
+        query = query.filter(_has_amenities(db, filters.amenities))
+    query = query.filter(columns[0] != None)
+    return keyset_page(query, columns, cursor, limit=limit, descending=descending)
+
+
+# Inventory: one conditional UPDATE takes a unit, so concurrent bookings
+# can't both see the last room (the row lock serialises them on PostgreSQL).
+# NULL inventory is not tracked and always succeeds.
+INVENTORY = {Hotel: Hotel.available_rooms, Flight: Flight.available_seats}
+
+def reserve_inventory(db: Session, model, row_id: int) -> bool:
+    """
+    Take one unit of model row_id's inventory inside the caller's transaction.
+    False when the row doesn't exist or is sold out.
+    """
+    column = INVENTORY[model]
+    result = db.execute(
+        update(model)
+          .where(model.id == row_id, or_(column == None, column > 0))
+          .values({column: column - 1})
+    )
+    return result.rowcount == 1
+
+def release_inventory(db: Session, model, row_id: int):
+    column = INVENTORY[model]
+    db.execute(
+        update(model)
+          .where(model.id == row_id)
+          .values({column: column + 1})
+    )
+
+
 # Booking CRUD
-def create_booking(db: Session, booking: BookingCreate):
+def create_booking(db: Session, booking: BookingCreate, commit: bool = True):
     db_booking = Booking(**booking.dict(), booking_date=date.today())
     db.add(db_booking)
+    mark_changed(db, booking.user_id)
+    if not commit:
+        db.flush()  # assigns the id; the caller commits
+        return db_booking
     db.commit()
     db.refresh(db_booking)
     return db_booking
 
-def get_bookings(db: Session, user_id: str, skip: int = 0, limit: int = 10):
+def get_booking_rows(db: Session, user_id: str, skip: int = 0, limit: int = 10, cursor: str = None):
+    """
+    get_bookings as plain rows: the booking columns followed by the
+    flight and hotel columns of serialization.FLIGHT / HOTEL, one query.
+    """
+    query = (
+        db.query(
+            Booking.id, Booking.user_id, Booking.flight_id, Booking.hotel_id, Booking.booking_date,
+            *FLIGHT.labeled("flight_"), *HOTEL.labeled("hotel_"),
+        )
+          .outerjoin(Flight, Booking.flight_id == Flight.id)
+          .outerjoin(Hotel, Booking.hotel_id == Hotel.id)
+          .filter(Booking.user_id == user_id)
+    )
+    return keyset_page(query, (Booking.booking_date, Booking.id), cursor, skip, limit)
+
+def delete_bookings(db: Session, booking_ids: list[int], user_id: str = None):
     """
-    Return list of Booking ORM objects with .flight and .hotel populated.
+    Delete the bookings and return their inventory in one transaction.
+    Returns how many were deleted, or None (deleting nothing) if any id
+    doesn't exist (or, with user_id, isn't that user's).
+    """
+    ids = set(booking_ids)
+    query = db.query(Booking).filter(Booking.id.in_(ids))
+    if user_id is not None:
+        query = query.filter(Booking.user_id == user_id)
+    bookings = query.all()
+    if len(bookings) != len(ids):
+        return None
+    for booking in bookings:
+        if booking.flight_id is not None:
+            release_inventory(db, Flight, booking.flight_id)
+        if booking.hotel_id is not None:
+            release_inventory(db, Hotel, booking.hotel_id)
+        mark_changed(db, booking.user_id)
+        db.delete(booking)
+    db.commit()
+    return len(bookings)
+
+def get_bookings_version(db: Session, user_id: str):
+    return db.scalar(select(User.bookings_version).where(User.id == user_id))
+
+def get_bookings(db: Session, user_id: str, skip: int = 0, limit: int = 10, cursor: str = None):
+    """
+    Return list of Booking ORM objects with .flight and .hotel populated,
+    oldest first, keyset-paginated on (booking_date, id).
     FastAPI/Pydantic will automatically convert them according to your Booking schema.
     """
-    return (
+    query = (
         db.query(Booking)
           .options(
             joinedload(Booking.flight),
             joinedload(Booking.hotel),
           )
           .filter(Booking.user_id == user_id)
-          .offset(skip)
-          .limit(limit)
-          .all()
     )
+    return keyset_page(query, (Booking.booking_date, Booking.id), cursor, skip, limit)
 
-def delete_flight_booking(db: Session, booking_id: int):
-    booking = (
-        db.query(Booking)
-          .filter(Booking.id == booking_id,
-                  Booking.flight_id != None)
-          .first()
-    )
+def delete_flight_booking(db: Session, booking_id: int, user_id: str = None):
+    query = db.query(Booking).filter(Booking.id == booking_id, Booking.flight_id != None)
+    if user_id is not None:
+        query = query.filter(Booking.user_id == user_id)
+    booking = query.first()
     if booking:
+        release_inventory(db, Flight, booking.flight_id)
+        mark_changed(db, booking.user_id)
         db.delete(booking)
         db.commit()
         return {"message": "Flight booking deleted"}
     return {"message": "Booking not found"}
 
-def delete_hotel_booking(db: Session, booking_id: int):
-    booking = (
-        db.query(Booking)
-          .filter(Booking.id == booking_id,
-                  Booking.hotel_id != None)
-          .first()
-    )
+def delete_hotel_booking(db: Session, booking_id: int, user_id: str = None):
+    query = db.query(Booking).filter(Booking.id == booking_id, Booking.hotel_id != None)
+    if user_id is not None:
+        query = query.filter(Booking.user_id == user_id)
+    booking = query.first()
     if booking:
+        release_inventory(db, Hotel, booking.hotel_id)
+        mark_changed(db, booking.user_id)
         db.delete(booking)
         db.commit()
         return {"message": "Hotel booking deleted"}
-    return {"message": "Booking not found"}
\ No newline at end of file
+    return {"message": "Booking not found"}
+
+
+# Time every query function (db_call_duration_seconds on /metrics)
+metrics.time_functions(sys.modules[__name__])
@@ -0,0 +1,131 @@
+# app/crud_async.py
+#
+# Async equivalents of everything in app/crud.py, usable from async handlers
+# with either kind of session from database.get_session:
+#   - AsyncSession (DB_ASYNC=true): the crud function runs via run_sync on the
+#     async driver (asyncpg / aiosqlite), so waiting on the database never
+#     holds a thread
+#   - Session: the crud function runs in the threadpool as before
+# The query logic itself lives only in app/crud.py.
+
+from typing import Union
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.concurrency import run_in_threadpool
+from app import crud, database
+from app.models import User
+from app.schemas import UserCreate, GoogleUserCreate, HotelCreate, FlightCreate, BookingCreate, HotelUpdate, FlightUpdate, FlightQuery, HotelQuery
+
+AnySession = Union[Session, AsyncSession]
+
+
+async def run(db: AnySession, fn, *args):
+    """
+    Run fn(session, *args) without blocking the event loop.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+
+async def run_in_new_session(fn, *args):
+    """
+    Like run(), for work outside a request (background tasks) that has
+    no session of its own.
+    """
+    if database.DB_ASYNC:
+        async with database.AsyncSessionLocal() as db:
+            return await run(db, fn, *args)
+    db = database.SessionLocal()
+    try:
+        return await run(db, fn, *args)
+    finally:
+        db.close()
+
+
+# User CRUD
+async def get_user(db: AnySession, username: str):
+    return await run(db, crud.get_user, username)
+
+async def get_user_by_id(db: AnySession, user_id: str):
+    return await run(db, crud.get_user_by_id, user_id)
+
+async def create_user(db: AnySession, user: UserCreate, hashed_pw: str = None):
+    return await run(db, crud.create_user, user, hashed_pw)
+
+async def create_google_user(db: AnySession, user: GoogleUserCreate):
+    return await run(db, crud.create_google_user, user)
+
+async def update_password_hash(db: AnySession, user: User, hashed_pw: str):
+    return await run(db, crud.update_password_hash, user, hashed_pw)
+
+
+# Hotel CRUD
+async def get_hotels(db: AnySession, skip: int = 0, limit: int = 10, cursor: str = None, columns: list = None):
+    return await run(db, crud.get_hotels, skip, limit, cursor, columns)
+
+async def create_hotel(db: AnySession, hotel: HotelCreate):
+    return await run(db, crud.create_hotel, hotel)
+
+async def update_hotel(db: AnySession, hotel_id: int, hotel_data: HotelUpdate):
+    return await run(db, crud.update_hotel, hotel_id, hotel_data)
+
+
+# Flight CRUD
+async def get_flights(db: AnySession, skip: int = 0, limit: int = 10, cursor: str = None, columns: list = None):
+    return await run(db, crud.get_flights, skip, limit, cursor, columns)
+
+async def create_flight(db: AnySession, flight: FlightCreate):
+    return await run(db, crud.create_flight, flight)
+
+async def update_flight(db: AnySession, flight_id: int, flight_data: FlightUpdate):
+    return await run(db, crud.update_flight, flight_id, flight_data)
+
+
+# Bulk import
+async def bulk_upsert_flights(db: AnySession, flights: list[FlightCreate]):
+    return await run(db, crud.bulk_upsert_flights, flights)
+
+async def bulk_upsert_hotels(db: AnySession, hotels: list[HotelCreate]):
+    return await run(db, crud.bulk_upsert_hotels, hotels)
+
+
+# Catalog queries
+async def query_flights(db: AnySession, filters: FlightQuery, sort: str = "price", limit: int = 10, cursor: str = None,
+                        select_columns: list = None):
+    return await run(db, crud.query_flights, filters, sort, limit, cursor, select_columns)
+
+async def query_hotels(db: AnySession, filters: HotelQuery, sort: str = "price", limit: int = 10, cursor: str = None,
+                       select_columns: list = None):
+    return await run(db, crud.query_hotels, filters, sort, limit, cursor, select_columns)
+
+
+# Search-ingested offers
+async def get_offer(db: AnySession, model, offer_hash: str):
+    return await run(db, crud.get_offer, model, offer_hash)
+
+async def find_flight_offers(db: AnySession, origin: str, destination: str, outbound_date, return_date):
+    return await run(db, crud.find_flight_offers, origin, destination, outbound_date, return_date)
+
+async def find_hotel_offers(db: AnySession, location: str, check_in_date, check_out_date):
+    return await run(db, crud.find_hotel_offers, location, check_in_date, check_out_date)
+
+
+# Booking CRUD
+async def create_booking(db: AnySession, booking: BookingCreate):
+    return await run(db, crud.create_booking, booking)
+
+async def get_bookings_version(db: AnySession, user_id: str):
+    return await run(db, crud.get_bookings_version, user_id)
+
+async def get_bookings(db: AnySession, user_id: str, skip: int = 0, limit: int = 10, cursor: str = None):
+    return await run(db, crud.get_bookings, user_id, skip, limit, cursor)
+
+async def get_booking_rows(db: AnySession, user_id: str, skip: int = 0, limit: int = 10, cursor: str = None):
+    return await run(db, crud.get_booking_rows, user_id, skip, limit, cursor)
+
+async def delete_flight_booking(db: AnySession, booking_id: int, user_id: str = None):
+    return await run(db, crud.delete_flight_booking, booking_id, user_id)
+
+async def delete_hotel_booking(db: AnySession, booking_id: int, user_id: str = None):
+    return await run(db, crud.delete_hotel_booking, booking_id, user_id)
@@ -0,0 +1,160 @@
+# app/db_pool.py
+
+import os
+import time
+import uuid
+from sqlalchemy import exc, event
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# ► Pool sizing; size it to (workers x expected concurrent DB requests) and
+# keep it under Postgres' max_connections / PgBouncer's pool size
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Recycle connections older than this (seconds) and ping before use, so a
+# Postgres restart or idle-killed connection doesn't surface as a 500
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Per-statement server-side timeout on PostgreSQL (ms); 0 disables
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+# Behind PgBouncer in transaction mode: no server-side prepared statement
+# caches and no startup options (set statement_timeout on the role instead)
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+# SQLite: WAL journal so readers don't block the writer (and vice versa);
+# concurrent writers wait up to SQLITE_BUSY_TIMEOUT_MS for the lock
+SQLITE_WAL = os.getenv("SQLITE_WAL", "true").lower() == "true"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000"))
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolMetrics:
+    """
+    Checkout wait-time histogram and timeout count for one engine's pool.
+    """
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)  # last one is +Inf
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.timeouts = 0
+
+    def observe_wait(self, seconds: float):
+        self.wait_count += 1
+        self.wait_sum += seconds
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def snapshot(self, pool) -> dict:
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeouts": self.timeouts,
+            "wait_seconds": {
+                "count": self.wait_count,
+                "sum": round(self.wait_sum, 6),
+                "buckets": {
+                    **{str(bound): n for bound, n in zip(WAIT_BUCKETS, self.bucket_counts)},
+                    "+Inf": self.bucket_counts[-1],
+                },
+            },
+        }
+
+
+class _TimedCheckout:
+    """
+    Times how long each checkout waits for a free connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_url(url: str, is_async: bool = False) -> str:
+    """
+    Adjust the URL for PgBouncer: turn off SQLAlchemy's asyncpg statement cache.
+    """
+    if DB_PGBOUNCER and is_async and url.startswith("postgres") and "prepared_statement_cache_size" not in url:
+        return url + ("&" if "?" in url else "?") + "prepared_statement_cache_size=0"
+    return url
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    create_engine / create_async_engine keyword arguments for url.
+    """
+    options = {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    connect_args = {}
+    if url.startswith("sqlite"):
+        if not is_async:
+            connect_args["check_same_thread"] = False
+    elif url.startswith("postgres"):
+        if DB_PGBOUNCER:
+            if is_async:
+                # unique names so a statement never collides on a shared server connection
+                connect_args["statement_cache_size"] = 0
+                connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+        elif DB_STATEMENT_TIMEOUT_MS:
+            if is_async:
+                connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+            else:
+                connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def configure_sqlite(engine):
+    """
+    Set the SQLite pragmas on every new connection of engine (sync or async).
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        if SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute("PRAGMA synchronous = NORMAL")  # durable at checkpoints; safe with WAL
+        cursor.close()
@@ -0,0 +1,76 @@
+# app/google_auth.py
+#
+# Server-side check of a Google Sign-In credential (an RS256-signed ID
+# token) before /users/google/ trusts who it names: signature against
+# Google's published keys, issuer, audience (our client id) and expiry.
+# Verification and the key set (fetched, cached and refreshed under a lock)
+# are PyJWT's; needs PyJWT[crypto], without it Google sign-in is off.
+
+import os
+import logging
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import jwt
+    from jwt.algorithms import has_crypto
+except ImportError:  # PyJWT not installed
+    jwt = None
+    has_crypto = False
+
+logger = logging.getLogger(__name__)
+
+# OAuth client id the frontend signs in with (VITE_GOOGLE_CLIENT_ID); unset
+# disables Google sign-in
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+# How long Google's key set is reused before it's fetched again (seconds)
+GOOGLE_CERTS_CACHE_SECONDS = int(os.getenv("GOOGLE_CERTS_CACHE_SECONDS", "3600"))
+# Allowed clock difference with Google (seconds)
+GOOGLE_CLOCK_SKEW = int(os.getenv("GOOGLE_CLOCK_SKEW", "60"))
+
+# an unknown kid (Google rotated its keys) refetches the set, at most once a minute
+google_keys = jwt.PyJWKClient(
+    GOOGLE_CERTS_URL, lifespan=GOOGLE_CERTS_CACHE_SECONDS, timeout=5, cooldown_duration=60,
+) if jwt is not None else None
+
+
+def _invalid(detail: str = "Invalid Google credential") -> HTTPException:
+    return HTTPException(401, detail=detail)
+
+
+def _verify(credential: str) -> dict:
+    header = jwt.get_unverified_header(credential)  # DecodeError unless a JSON object
+    if header.get("alg") != "RS256" or not isinstance(header.get("kid"), str):
+        raise jwt.InvalidTokenError("not a Google ID token")
+    # blocking: the key set may be fetched with urllib
+    signing_key = google_keys.get_signing_key(header["kid"])
+    return jwt.decode(
+        credential, signing_key.key, algorithms=["RS256"],
+        audience=GOOGLE_CLIENT_ID, issuer=GOOGLE_ISSUERS, leeway=GOOGLE_CLOCK_SKEW,
+        options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+    )
+
+
+async def verify_id_token(credential: str) -> dict:
+    """
+    The claims of a valid Google ID token issued for GOOGLE_CLIENT_ID;
+    401 for anything else, 503 when Google sign-in isn't available.
+    """
+    if not GOOGLE_CLIENT_ID:
+        raise HTTPException(503, detail="Google sign-in is not configured (GOOGLE_CLIENT_ID).")
+    if google_keys is None or not has_crypto:
+        raise HTTPException(503, detail="Google sign-in needs PyJWT[crypto] installed.")
+    try:
+        claims = await run_in_threadpool(_verify, credential)
+    except jwt.PyJWKClientConnectionError as e:
+        logger.warning("fetching Google signing keys failed: %s", e)
+        raise HTTPException(503, detail="Google sign-in is temporarily unavailable.")
+    except jwt.ExpiredSignatureError:
+        raise _invalid("Google credential expired")
+    except jwt.PyJWTError:
+        raise _invalid()
+    if not isinstance(claims.get("sub"), str) or not claims.get("email") or claims.get("email_verified") is False:
+        raise _invalid()
+    return claims
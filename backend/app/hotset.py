@@ -0,0 +1,58 @@
+# app/hotset.py
+
+import os
+from collections import Counter
+
+# Number of most-searched routes/cities kept pre-warmed; 0 disables the scheduler
+HOT_SET_SIZE = int(os.getenv("HOT_SET_SIZE", "0"))
+# Seconds between pre-warm passes
+HOT_SET_INTERVAL = float(os.getenv("HOT_SET_INTERVAL", "60"))
+
+
+class HotSet:
+    """
+    Tracks how often each search key is requested, remembering how to
+    re-fetch it, so the scheduler can keep the top-N keys warm.
+    Counts are halved on every pass so the set follows current demand.
+    """
+
+    def __init__(self, size: int = HOT_SET_SIZE, max_tracked: int = None):
+        self.size = size
+        self.max_tracked = max_tracked or max(size * 10, 100)
+        self.counts: Counter = Counter()
+        self.fetchers: dict = {}
+
+    def record(self, key: str, provider: str, fetch):
+        if not self.size:
+            return
+        self.counts[key] += 1
+        self.fetchers[key] = (provider, fetch)
+        if len(self.counts) > self.max_tracked:
+            self._prune()
+
+    def top(self) -> list:
+        return [(key, *self.fetchers[key]) for key, _ in self.counts.most_common(self.size)]
+
+    def decay(self):
+        for key in list(self.counts):
+            self.counts[key] //= 2
+            if not self.counts[key]:
+                del self.counts[key]
+                del self.fetchers[key]
+
+    def _prune(self):
+        keep = dict(self.counts.most_common(self.max_tracked // 2))
+        for key in list(self.counts):
+            if key not in keep:
+                del self.counts[key]
+                del self.fetchers[key]
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "tracked": len(self.counts),
+            "top": [key for key, _ in self.counts.most_common(self.size)],
+        }
+
+
+hot_searches = HotSet()
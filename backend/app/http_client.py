@@ -0,0 +1,76 @@
+# app/http_client.py
+
+import os
+import importlib.util
+import httpx
+
+# Pool / timeout settings for all outbound calls (SerpAPI, OpenWeather)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+
+# Read timeouts per upstream (deep_search flights are much slower than weather)
+FLIGHTS_TIMEOUT = float(os.getenv("FLIGHTS_TIMEOUT", "30"))
+HOTELS_TIMEOUT = float(os.getenv("HOTELS_TIMEOUT", "10"))
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "5"))
+
+# HTTP/2 when the h2 package is installed (found without importing it;
+# httpx imports it when the client is created)
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+_client: httpx.AsyncClient | None = None
+_ssl_context = None
+
+
+def timeout(read: float) -> httpx.Timeout:
+    """
+    Build a per-call timeout with the shared connect/pool limits.
+    """
+    return httpx.Timeout(read, connect=HTTP_CONNECT_TIMEOUT, pool=HTTP_POOL_TIMEOUT)
+
+
+def ssl_context():
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = httpx.create_ssl_context()
+    return _ssl_context
+
+
+def preload():
+    """
+    Import the transport stack (httpx loads httpcore lazily) and build the
+    TLS context now. Called in the gunicorn master before forking, so
+    workers inherit both instead of each paying for them on startup.
+    """
+    import httpcore  # noqa: F401
+    if HTTP2_ENABLED:
+        import h2.connection  # noqa: F401
+    ssl_context()
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the application-wide AsyncClient, creating it on first use.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            verify=ssl_context(),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=timeout(HOTELS_TIMEOUT),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
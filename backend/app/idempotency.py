@@ -0,0 +1,94 @@
+# app/idempotency.py
+#
+# Idempotency-Key support for booking requests. The stored response is
+# written in the same transaction as the booking it describes, so a key is
+# only ever recorded for a booking that committed. If two requests with the
+# same key race, both may do the work, but only one can insert the key; the
+# other rolls back (releasing its inventory) and replays the winner's response.
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import crud_async
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Keys are remembered this long; a retry after that is treated as a new request
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+MAX_KEY_LENGTH = 255
+
+
+def fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def check_key(key: str):
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(400, detail=f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters.")
+
+
+def _cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+
+
+def _replay(record: IdempotencyKey, request_fingerprint: str):
+    if record.fingerprint != request_fingerprint:
+        raise HTTPException(422, detail=f"{IDEMPOTENCY_HEADER} was already used for a different request.")
+    return record.response
+
+
+def lookup(db: Session, key: str, request_fingerprint: str):
+    """
+    The stored response for key, or None if the key is new (or expired).
+    """
+    record = db.get(IdempotencyKey, key)
+    if record is None or record.created_at < _cutoff():
+        return None
+    return _replay(record, request_fingerprint)
+
+
+def commit_with_response(db: Session, key: str, request_fingerprint: str, status_code: int, response):
+    """
+    Record key -> response and commit the caller's transaction. Returns
+    None when this request won, else the response stored by the request
+    that beat it (this request's work is rolled back).
+    """
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.created_at < _cutoff()))
+    db.add(IdempotencyKey(
+        key=key, fingerprint=request_fingerprint,
+        status_code=status_code, response=response,
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return _replay(db.get(IdempotencyKey, key), request_fingerprint)
+    return None
+
+
+def purge_expired(db: Session) -> int:
+    deleted = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < _cutoff())).rowcount
+    db.commit()
+    return deleted
+
+
+async def purge_expired_keys():
+    """
+    Background loop: drop expired keys once an hour.
+    """
+    while True:
+        try:
+            await crud_async.run_in_new_session(purge_expired)
+        except Exception as e:
+            logger.warning("purging idempotency keys failed: %s", e)
+        await asyncio.sleep(3600)
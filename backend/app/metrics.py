@@ -0,0 +1,238 @@
+# app/metrics.py
+#
+# Prometheus metrics without a client library: counters, gauges and
+# histograms kept in plain dicts, rendered in the text exposition format
+# at GET /metrics. Recording is a dict lookup plus a bisect, so it is
+# cheap enough for every request, upstream call and query.
+#
+# Components that already keep their own stats (caches, pools, breakers...)
+# are exported through collectors read at scrape time instead of being
+# instrumented twice.
+
+import os
+import time
+import bisect
+import functools
+import threading
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_metrics = []
+_collectors = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()  # crud timings are recorded from threadpool workers
+        _metrics.append(self)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, labels)} {value}" for labels, value in list(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, seconds: float, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # per-bucket (not cumulative) counts, the last one is +Inf; then sum
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, seconds)] += 1
+            series[-1] += seconds
+
+    def render(self) -> list[str]:
+        lines = []
+        for labels, series in list(self._values.items()):
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), series):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels((*self.labelnames, 'le'), (*labels, bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def collector(fn):
+    """
+    Register fn() -> iterable of (name, kind, help, labelnames, [(labels, value)]),
+    called on every scrape.
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def render() -> str:
+    lines = []
+    for metric in _metrics:
+        if metric._values:
+            lines += metric.header() + metric.render()
+    for fn in _collectors:
+        for name, kind, help, labelnames, samples in fn():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{_labels(labelnames, labels)} {value}" for labels, value in samples if value is not None]
+    return "\n".join(lines) + "\n"
+
+
+def _flatten(stats: dict, prefix: str = ""):
+    for key, value in stats.items():
+        name = f"{prefix}_{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and name.isidentifier():
+            yield name, value
+
+
+def stats_collector(prefix: str, stats, counters=(), label: str = None):
+    """
+    Collector exporting the numbers in a component's stats() dict as
+    prefix_<key> gauges, or prefix_<key>_total counters for the keys in
+    counters. With label, stats() returns {label value: stats dict}.
+    Strings and histogram buckets are skipped.
+    """
+    def collect():
+        by_label = stats() if label else {None: stats()}
+        series = {}
+        for label_value, component in by_label.items():
+            for key, value in _flatten(component):
+                series.setdefault(key, []).append(((label_value,) if label else (), value))
+        for key, samples in series.items():
+            if key in counters:
+                yield f"{prefix}_{key}_total", "counter", f"{prefix} {key}.", (label,) if label else (), samples
+            else:
+                yield f"{prefix}_{key}", "gauge", f"{prefix} {key}.", (label,) if label else (), samples
+
+    return collector(collect)
+
+
+# --- Hot-path metrics ---
+
+http_requests = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response, per route and status.",
+    ("method", "route", "status"),
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requests being handled.")
+upstream_requests = Histogram(
+    "upstream_request_duration_seconds", "Outbound HTTP attempts per upstream and status (or error type).",
+    ("upstream", "status"),
+)
+upstream_in_flight = Gauge("upstream_requests_in_flight", "Outbound HTTP attempts waiting for an answer.", ("upstream",))
+db_calls = Histogram(
+    "db_call_duration_seconds", "app/crud.py functions, including waiting for a connection.",
+    ("function", "outcome"), DB_BUCKETS,
+)
+password_hashes = Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify, including time queued for a worker.",
+    ("operation",), (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+def time_functions(module, histogram: Histogram = db_calls):
+    """
+    Replace every public function defined in module with one that records
+    its duration in histogram, labelled with the function name and
+    ok/error. Call at the end of the module, before anything imports from it.
+    """
+    if not METRICS_ENABLED:
+        return
+    for name, fn in list(vars(module).items()):
+        if callable(fn) and not name.startswith("_") and getattr(fn, "__module__", None) == module.__name__ \
+                and not isinstance(fn, type):
+            setattr(module, name, _timed(fn, histogram))
+
+
+def _timed(fn, histogram: Histogram):
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = fn(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            histogram.observe(time.perf_counter() - start, name, outcome)
+
+    return timed
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request latency per route template and status, and
+    the number of requests in flight.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            # the route template, not the raw path, so ids don't explode the label set
+            route = scope.get("route")
+            http_requests.observe(
+                time.perf_counter() - start, scope["method"],
+                route.path if route is not None else "<unmatched>", status,
+            )
@@ -0,0 +1,123 @@
+# app/migrations.py
+#
+# Schema changes for databases created before a model change. create_all()
+# only creates missing tables, so anything added to an existing table goes
+# here as a numbered step. Each step runs once and is recorded in
+# schema_migrations; steps must be safe to re-run on a fresh database.
+#
+# Run once per deploy, before the app starts serving:
+#   python -m app.migrations
+# (the gunicorn config does this in the master process).
+
+import os
+import logging
+from sqlalchemy import text, inspect
+from app import models
+
+logger = logging.getLogger(__name__)
+
+# Upgrade the schema in the app's lifespan (fine for a single local process).
+# Production turns this off and runs the step above once instead, so
+# workers don't each repeat it on every cold start.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() == "true"
+# Any constant key; concurrent upgrades (several nodes starting) queue on it
+PG_LOCK_KEY = 72_616_001
+
+
+def _sql(*statements):
+    # a step that runs fixed DDL: the schema as it was at that revision,
+    # never today's models (a later column may not exist yet)
+    def step(conn):
+        for statement in statements:
+            conn.execute(text(statement))
+    return step
+
+
+def _add_column(conn, table: str, column: str, ddl_type: str):
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def _offer_hash_columns(conn):
+    for table in ("flights", "hotels"):
+        _add_column(conn, table, "offer_hash", "VARCHAR(64)")
+    _sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_flights_offer_hash ON flights (offer_hash)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_hotels_offer_hash ON hotels (offer_hash)",
+    )(conn)
+
+
+def _catalog_query_indexes(conn):
+    _sql(
+        "CREATE INDEX IF NOT EXISTS ix_hotels_location_price_id ON hotels (location, price, id)",
+        "CREATE INDEX IF NOT EXISTS ix_hotels_rating_id ON hotels (overall_rating, id)",
+        "CREATE INDEX IF NOT EXISTS ix_flights_outbound_price_id ON flights (outbound_date, price, id)",
+        "CREATE INDEX IF NOT EXISTS ix_flights_airline_price ON flights (airline, price)",
+    )(conn)
+    if conn.dialect.name == "postgresql":
+        # amenities filter: hotels.amenities::jsonb @> '["Free Wi-Fi", ...]'
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_hotels_amenities_gin "
+            "ON hotels USING gin ((amenities::jsonb) jsonb_path_ops)"
+        ))
+
+
+MIGRATIONS = [
+    ("0001_listing_indexes", _sql(
+        "CREATE INDEX IF NOT EXISTS ix_hotels_location_check_in ON hotels (location, check_in_date)",
+        "CREATE INDEX IF NOT EXISTS ix_hotels_price_id ON hotels (price, id)",
+        "CREATE INDEX IF NOT EXISTS ix_flights_route_outbound ON flights (departure_id, arrival_id, outbound_date)",
+        "CREATE INDEX IF NOT EXISTS ix_flights_price_id ON flights (price, id)",
+        "CREATE INDEX IF NOT EXISTS ix_bookings_user_date_id ON bookings (user_id, booking_date, id)",
+    )),
+    ("0002_natural_key_indexes", _sql(
+        "CREATE INDEX IF NOT EXISTS ix_hotels_natural_key ON hotels (name, location, check_in_date)",
+        "CREATE INDEX IF NOT EXISTS ix_flights_natural_key ON flights (airline, flight_number, outbound_date)",
+    )),
+    ("0003_offer_hash", _offer_hash_columns),
+    ("0004_catalog_query_indexes", _catalog_query_indexes),
+    ("0005_flight_seats", lambda conn: _add_column(conn, "flights", "available_seats", "INTEGER")),
+    ("0006_bookings_version", lambda conn: _add_column(conn, "users", "bookings_version", "INTEGER NOT NULL DEFAULT 0")),
+]
+
+
+def migrate(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations (version VARCHAR(64) PRIMARY KEY)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    for version, step in MIGRATIONS:
+        if version in applied:
+            continue
+        logger.info("applying migration %s", version)
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:v)"), {"v": version})
+
+
+def upgrade(engine):
+    """
+    Create missing tables, then apply pending migrations. On PostgreSQL an
+    advisory lock makes concurrent upgrades run one after another.
+    """
+    with engine.connect() as lock_conn:
+        if engine.dialect.name == "postgresql":
+            lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": PG_LOCK_KEY})
+        try:
+            models.Base.metadata.create_all(bind=engine)
+            migrate(engine)
+        finally:
+            if engine.dialect.name == "postgresql":
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PG_LOCK_KEY})
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    from app.database import engine
+
+    upgrade(engine)
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey,Float
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey,Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy import JSON
 from app.database import Base
-from datetime import date
+from datetime import date, datetime
 
 
 # User Model
@@ -14,6 +14,7 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String, nullable=True)  # Nullable for Google users
     is_active = Column(Boolean, default=True)
+    bookings_version = Column(Integer, nullable=False, default=0, server_default="0")  # bumped by every booking write
 
     # Relationships
     bookings = relationship("Booking", back_populates="user")
@@ -34,7 +35,17 @@ class Hotel(Base):
     check_out_date = Column(Date)
     amenities      = Column(JSON, nullable=True)
     images         = Column(JSON, nullable=True)
+    offer_hash     = Column(String(64), unique=True, index=True, nullable=True)  # set for search-ingested offers
     bookings = relationship("Booking", back_populates="hotel")
+
+    __table_args__ = (
+        Index("ix_hotels_location_check_in", "location", "check_in_date"),
+        Index("ix_hotels_price_id", "price", "id"),  # keyset pagination order
+        Index("ix_hotels_natural_key", "name", "location", "check_in_date"),  # bulk upserts
+        # /catalog/hotels: filter by city sorted by price, or sort by rating
+        Index("ix_hotels_location_price_id", "location", "price", "id"),
+        Index("ix_hotels_rating_id", "overall_rating", "id"),
+    )
     
 
 # Flight Model
@@ -52,9 +63,20 @@ class Flight(Base):
     arrival_time    = Column(String)
     total_duration  = Column(Integer)
     price           = Column(Float)
+    available_seats = Column(Integer, nullable=True)  # None: not tracked, never sells out
     google_flights_url = Column(String)
+    offer_hash      = Column(String(64), unique=True, index=True, nullable=True)  # set for search-ingested offers
     bookings = relationship("Booking", back_populates="flight")
 
+    __table_args__ = (
+        Index("ix_flights_route_outbound", "departure_id", "arrival_id", "outbound_date"),
+        Index("ix_flights_price_id", "price", "id"),  # keyset pagination order
+        Index("ix_flights_natural_key", "airline", "flight_number", "outbound_date"),  # bulk upserts
+        # /catalog/flights: date ranges across routes, airline filter
+        Index("ix_flights_outbound_price_id", "outbound_date", "price", "id"),
+        Index("ix_flights_airline_price", "airline", "price"),
+    )
+
 # Booking Model (For both Hotels and Flights)
 class Booking(Base):
     __tablename__ = "bookings"
@@ -70,3 +92,18 @@ class Booking(Base):
     flight = relationship("Flight", back_populates="bookings",lazy="joined")
     hotel  = relationship("Hotel",  back_populates="bookings",lazy="joined")
 
+    # /bookings/{user_id}: filter by user, keyset-paginate by (booking_date, id)
+    __table_args__ = (
+        Index("ix_bookings_user_date_id", "user_id", "booking_date", "id"),
+    )
+
+
+# Stored responses for requests sent with an Idempotency-Key header
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key         = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # what the key was first used for
+    status_code = Column(Integer, nullable=False)
+    response    = Column(JSON, nullable=False)
+    created_at  = Column(DateTime, default=datetime.utcnow, index=True)
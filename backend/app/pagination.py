@@ -0,0 +1,66 @@
+# app/pagination.py
+
+import json
+import base64
+from datetime import date
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: tuple) -> str:
+    """
+    Opaque token for the sort key of the last row on a page.
+    """
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: tuple) -> list:
+    """
+    The sort key values encoded in cursor, one per column (dates parsed
+    back); 400 for anything encode_cursor couldn't have produced.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong shape")
+        decoded = []
+        for col, v in zip(columns, values):
+            if isinstance(v, bool) or not isinstance(v, (str, int, float, type(None))):
+                raise ValueError("not a scalar")
+            if isinstance(v, str) and col.type.python_type is date:
+                v = date.fromisoformat(v)
+            decoded.append(v)
+        return decoded
+    except ValueError:
+        raise HTTPException(400, detail="Invalid cursor.")
+
+
+def keyset_page(query, columns: tuple, cursor: str = None, skip: int = 0, limit: int = 10,
+                descending: bool = False):
+    """
+    Order query by columns (all ascending, or all descending) and return the
+    page after cursor. Seeks on the index instead of scanning past skipped
+    rows; plain skip/offset is only used by old clients that send no cursor.
+    """
+    query = query.order_by(*(c.desc() for c in columns) if descending else columns)
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+
+def next_cursor(rows: list, limit: int, key) -> str | None:
+    """
+    Cursor for the page after rows, or None when this was the last page.
+    """
+    if len(rows) < limit:
+        return None
+    return encode_cursor(key(rows[-1]))
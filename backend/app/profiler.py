@@ -0,0 +1,184 @@
+# app/profiler.py
+#
+# Opt-in per-request SQL profiler. With SQL_PROFILING on, a request is
+# profiled when it sends "X-SQL-Profile: 1" or is picked by
+# SQL_PROFILE_SAMPLE_RATE. Engine events then count its statements, their
+# total time and how often each statement shape repeats (the same SQL with
+# different parameters, i.e. an N+1). The summary goes back in the
+# X-SQL-Profile response header; the full profile is kept for
+# GET /debug/sql-profiles/{id}. Slow statements are logged with their plan.
+#
+# With SQL_PROFILING off no event listeners are installed at all.
+
+import os
+import time
+import uuid
+import random
+import logging
+import contextvars
+from collections import deque
+from sqlalchemy import event
+from starlette.datastructures import Headers, MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+SQL_PROFILING = os.getenv("SQL_PROFILING", "false").lower() == "true"
+# Fraction of requests profiled without asking (0 = only on request)
+SQL_PROFILE_SAMPLE_RATE = float(os.getenv("SQL_PROFILE_SAMPLE_RATE", "0"))
+# Statements slower than this (ms) are logged with their EXPLAIN plan; 0 disables
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+# Completed profiles kept for the debug endpoint
+SQL_PROFILE_KEEP = int(os.getenv("SQL_PROFILE_KEEP", "100"))
+
+PROFILE_HEADER = "X-SQL-Profile"
+
+_current = contextvars.ContextVar("sql_profile", default=None)
+recent_profiles: deque = deque(maxlen=SQL_PROFILE_KEEP)
+
+
+def _shape(statement: str) -> str:
+    return " ".join(statement.split())
+
+
+class Profile:
+    """
+    The statements one request issued, grouped by shape.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.shapes = {}  # shape -> [count, seconds]
+        self.slow = []
+
+    def record(self, statement: str, seconds: float):
+        self.statements += 1
+        self.db_seconds += seconds
+        entry = self.shapes.setdefault(_shape(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def duplicates(self) -> int:
+        """
+        Statements that repeated an earlier shape in this request.
+        """
+        return sum(count - 1 for count, _ in self.shapes.values())
+
+    def header(self) -> str:
+        return (f"id={self.id}; statements={self.statements}; duplicates={self.duplicates()}; "
+                f"db_ms={self.db_seconds * 1000:.1f}")
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "statements": self.statements,
+            "duplicates": self.duplicates(),
+            "db_ms": round(self.db_seconds * 1000, 3),
+        }
+
+    def details(self) -> dict:
+        shapes = sorted(self.shapes.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            **self.summary(),
+            "shapes": [
+                {"sql": sql, "count": count, "total_ms": round(seconds * 1000, 3)}
+                for sql, (count, seconds) in shapes
+            ],
+            "slow": self.slow,
+        }
+
+
+def _explain(conn, statement: str, parameters):
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        prefix = "EXPLAIN "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+    conn.info["sql_profile_explaining"] = True
+    try:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        conn.info["sql_profile_explaining"] = False
+    return [" ".join(str(column) for column in row) for row in rows]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and not conn.info.get("sql_profile_explaining"):
+        context._sql_profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    start = getattr(context, "_sql_profile_start", None)
+    if profile is None or start is None:
+        return
+    seconds = time.perf_counter() - start
+    profile.record(statement, seconds)
+
+    if SQL_SLOW_QUERY_MS and seconds * 1000 >= SQL_SLOW_QUERY_MS:
+        plan = None
+        # plain reads only: a plan for a write is rarely what's slow about it
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            plan = _explain(conn, statement, parameters)
+        profile.slow.append({"sql": _shape(statement), "ms": round(seconds * 1000, 3), "plan": plan})
+        logger.warning(
+            "slow query (%.1f ms) in %s %s: %s\n%s", seconds * 1000, profile.method, profile.path,
+            _shape(statement), "\n".join(plan or []),
+        )
+
+
+def instrument(engine):
+    """
+    Attach the profiler to engine (sync or async) when SQL_PROFILING is on.
+    """
+    if not SQL_PROFILING or engine is None:
+        return
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def get_profile(profile_id: str):
+    return next((p for p in recent_profiles if p.id == profile_id), None)
+
+
+class SQLProfilerMiddleware:
+    """
+    ASGI middleware: profile requests that ask for it (or are sampled) and
+    report the result in the X-SQL-Profile response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_PROFILING:
+            return await self.app(scope, receive, send)
+        requested = Headers(scope=scope).get(PROFILE_HEADER, "").lower() in ("1", "true")
+        if not requested and random.random() >= SQL_PROFILE_SAMPLE_RATE:
+            return await self.app(scope, receive, send)
+
+        profile = Profile(scope["method"], scope["path"])
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message.setdefault("headers", []))[PROFILE_HEADER] = profile.header()
+            await send(message)
+
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _current.reset(token)
+            recent_profiles.append(profile)
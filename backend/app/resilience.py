@@ -0,0 +1,293 @@
+# app/resilience.py
+
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+import httpx
+from fastapi import HTTPException
+from app import metrics
+from app.http_client import get_client, timeout, FLIGHTS_TIMEOUT, HOTELS_TIMEOUT, WEATHER_TIMEOUT
+
+# Circuit breaker: open when at least BREAKER_MIN_CALLS calls in the last
+# BREAKER_WINDOW seconds failed at BREAKER_FAILURE_RATE or more, then fail
+# fast for BREAKER_OPEN_SECONDS before letting a single probe call through
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+BREAKER_WINDOW = float(os.getenv("BREAKER_WINDOW", "30"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+# Retries: full-jitter exponential backoff, limited by a budget that earns
+# RETRY_BUDGET_RATIO of a retry per call (so retries stay ~20% of traffic)
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "0.1"))
+RETRY_BACKOFF_CAP = float(os.getenv("RETRY_BACKOFF_CAP", "2"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MAX = float(os.getenv("RETRY_BUDGET_MAX", "10"))
+
+# Hedging: send a second identical request if the first hasn't answered
+# after HEDGE_DELAY seconds (or the observed p95 when HEDGE_DELAY is 0).
+# Off by default since every hedge can cost an extra SerpAPI search.
+UPSTREAM_HEDGING = os.getenv("UPSTREAM_HEDGING", "false").lower() == "true"
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", "0"))
+HEDGE_MIN_SAMPLES = 20
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        min_calls: int = BREAKER_MIN_CALLS,
+        window: float = BREAKER_WINDOW,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._probing = False
+        self._outcomes: deque = deque()
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open":
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def release(self):
+        """
+        Give back a half-open probe that ended without an outcome (cancelled,
+        or an error that says nothing about the upstream), so the next call
+        can probe instead of the breaker staying half open for good.
+        """
+        if self.state == "half_open":
+            self._probing = False
+
+    def record(self, ok: bool):
+        now = time.monotonic()
+        if self.state == "half_open":
+            self._probing = False
+            if ok:
+                self.state = "closed"
+                self._outcomes.clear()
+            else:
+                self._open(now)
+            return
+
+        self._outcomes.append((now, ok))
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+        failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+            self._open(now)
+
+    def _open(self, now: float):
+        self.state = "open"
+        self.opened_at = now
+        self._outcomes.clear()
+
+
+class RetryBudget:
+    """
+    Token bucket for retries: every call deposits `ratio` tokens and every
+    retry spends one, so a failing upstream can't be hit with a retry storm.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, max_tokens: float = RETRY_BUDGET_MAX):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def _is_failure(response: httpx.Response) -> bool:
+    # Upstream trouble, not a bad request on our side
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class Upstream:
+    """
+    One outbound dependency (a SerpAPI engine or OpenWeather) with its own
+    circuit breaker, retry budget and latency window for hedging.
+    """
+
+    def __init__(self, name: str, read_timeout: float):
+        self.name = name
+        self.read_timeout = read_timeout
+        self.breaker = CircuitBreaker()
+        self.budget = RetryBudget()
+        self.latencies: deque = deque(maxlen=200)
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.hedges = 0
+        self.rejected = 0
+
+    async def get(self, url: str, params: dict) -> httpx.Response:
+        """
+        GET url with timeouts, breaker, budgeted jittered retries and optional
+        hedging. Returns the last response (which may still be a 5xx) or raises
+        the last transport error; raises 503 while the breaker is open.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise HTTPException(503, detail=f"{self.name} is temporarily unavailable, please retry shortly.")
+        self.calls += 1
+        self.budget.deposit()
+        # whether this call holds the breaker's half-open probe without having
+        # recorded its outcome; given back if the call ends any other way
+        probe = self.breaker.state == "half_open"
+
+        attempt = 0
+        try:
+            while True:
+                response, error = None, None
+                start = time.perf_counter()
+                metrics.upstream_in_flight.inc(self.name)
+                try:
+                    response = await self._send(url, params)
+                except httpx.TransportError as e:  # connect/read timeouts included
+                    error = e
+                finally:
+                    metrics.upstream_in_flight.dec(self.name)
+                    metrics.upstream_requests.observe(
+                        time.perf_counter() - start, self.name,
+                        response.status_code if response is not None else type(error).__name__ if error else "cancelled",
+                    )
+                ok = error is None and not _is_failure(response)
+                self.breaker.record(ok)
+                probe = False
+                if not ok:
+                    self.failures += 1
+
+                if ok or attempt >= UPSTREAM_MAX_RETRIES or not self.budget.withdraw() or not self.breaker.allow():
+                    if error is not None:
+                        raise error
+                    return response
+
+                probe = self.breaker.state == "half_open"
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt)))
+        finally:
+            if probe:
+                self.breaker.release()
+
+    @asynccontextmanager
+    async def stream(self, url: str, params: dict):
+        """
+        GET url as a streaming httpx response, to read the body as it arrives.
+        Goes through the breaker like get(), but a body that has been partly
+        consumed can't be replayed, so there are no retries or hedges; callers
+        fall back to get() when the stream fails before yielding anything.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise HTTPException(503, detail=f"{self.name} is temporarily unavailable, please retry shortly.")
+        self.calls += 1
+        probe = self.breaker.state == "half_open"
+
+        response, error = None, None
+        start = time.perf_counter()
+        metrics.upstream_in_flight.inc(self.name)
+        try:
+            async with get_client().stream("GET", url, params=params, timeout=timeout(self.read_timeout)) as response:
+                yield response
+        except httpx.TransportError as e:  # mid-body read errors included
+            error = e
+            raise
+        finally:
+            metrics.upstream_in_flight.dec(self.name)
+            metrics.upstream_requests.observe(
+                time.perf_counter() - start, self.name,
+                response.status_code if response is not None else type(error).__name__ if error else "cancelled",
+            )
+            if response is None and error is None:
+                if probe:
+                    self.breaker.release()
+            else:
+                ok = error is None and not _is_failure(response)
+                self.breaker.record(ok)
+                if not ok:
+                    self.failures += 1
+
+    def hedge_delay(self):
+        if not UPSTREAM_HEDGING:
+            return None
+        if HEDGE_DELAY > 0:
+            return HEDGE_DELAY
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return self.p95()
+
+    def p95(self):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    async def _send(self, url: str, params: dict) -> httpx.Response:
+        start = time.monotonic()
+        call = lambda: asyncio.ensure_future(
+            get_client().get(url, params=params, timeout=timeout(self.read_timeout))
+        )
+        tasks = {call()}
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.hedges += 1
+                    tasks.add(call())
+
+            # first successful answer wins; an error only counts once all attempts failed
+            pending = tasks
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.latencies.append(time.monotonic() - start)
+                        return task.result()
+                if not pending:
+                    return done.pop().result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        p95 = self.p95()
+        return {
+            "breaker": self.breaker.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "rejected": self.rejected,
+            "retry_budget": round(self.budget.tokens, 2),
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+        }
+
+
+upstreams = {
+    "google_flights": Upstream("google_flights", FLIGHTS_TIMEOUT),
+    "google_hotels": Upstream("google_hotels", HOTELS_TIMEOUT),
+    "openweather": Upstream("openweather", WEATHER_TIMEOUT),
+}
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import date
-from typing import Optional,List,Dict
+from typing import Optional,List,Dict,Union,Literal
 
 
 # --- User Schemas ---
@@ -15,6 +15,9 @@ class GoogleUserCreate(BaseModel):
     email: str
     name: str
 
+class GoogleCredential(BaseModel):
+    credential: str  # ID token from Google Sign-In, verified server-side
+
 class User(BaseModel):
     id: str  # Changed to str to accommodate Google user IDs
     username: str
@@ -24,6 +27,18 @@ class User(BaseModel):
     class Config:
         orm_mode = True
 
+class Tokens(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int  # seconds until access_token expires
+
+class UserWithTokens(User, Tokens):
+    pass
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 # --- Hotel Schemas ---
 
 class HotelBase(BaseModel):
@@ -61,6 +76,7 @@ class HotelUpdate(BaseModel):
 
 class Hotel(HotelBase):
     id: int
+    available_rooms: Optional[int] = None  # None: inventory not managed by us (search-ingested)
     link: Optional[str] 
     overall_rating:   Optional[float] 
     reviews: Optional[int]   
@@ -88,6 +104,7 @@ class FlightCreate(FlightBase):
     arrival_time: Optional[str] = None
     total_duration: Optional[int] = None
     google_flights_url: Optional[str] = None
+    available_seats: Optional[int] = None
   
     class Config:
         orm_mode = True
@@ -111,6 +128,7 @@ class Flight(FlightBase):
     arrival_time: Optional[str]
     total_duration: Optional[int] 
     google_flights_url: Optional[str] 
+    available_seats: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -140,3 +158,70 @@ class Booking(BaseModel):
     class Config:
         orm_mode = True
 
+
+class TripItem(BaseModel):
+    type: Literal["flight", "hotel"]
+    id: Optional[int] = None        # an existing flight/hotel id...
+    offer_id: Optional[str] = None  # ...or a search result's offer_id
+
+class TripBookingRequest(BaseModel):
+    user_id: Optional[str] = None  # defaults to the access token's user
+    items: List[TripItem]
+
+class CancelBookingsRequest(BaseModel):
+    booking_ids: List[int]
+
+
+
+# --- Batch Search Schemas ---
+
+class FlightSearchSpec(BaseModel):
+    type: Literal["flight"]
+    origin: str
+    destination: str
+    departure_date: str
+    return_date: Optional[str] = None
+
+class HotelSearchSpec(BaseModel):
+    type: Literal["hotel"]
+    destination: str
+    check_in: str
+    check_out: str
+    adults: int = 2
+    currency: str = "USD"
+    fields: Optional[str] = None  # as /search-hotels?fields=
+
+class WeatherSearchSpec(BaseModel):
+    type: Literal["weather"]
+    city_name: str
+    daily: bool = False
+
+class BatchSearchRequest(BaseModel):
+    searches: List[Union[FlightSearchSpec, HotelSearchSpec, WeatherSearchSpec]]
+
+
+# --- Catalog Query Schemas ---
+
+class FlightQuery(BaseModel):
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    departure_from: Optional[date] = None
+    departure_to: Optional[date] = None
+    return_from: Optional[date] = None
+    return_to: Optional[date] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    airlines: Optional[List[str]] = None
+    max_duration: Optional[int] = None
+
+class HotelQuery(BaseModel):
+    location: Optional[str] = None
+    check_in_from: Optional[date] = None
+    check_in_to: Optional[date] = None
+    check_out_from: Optional[date] = None
+    check_out_to: Optional[date] = None
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    min_rating: Optional[float] = None
+    min_reviews: Optional[int] = None
+    amenities: Optional[List[str]] = None  # hotels must have all of them
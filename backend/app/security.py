@@ -0,0 +1,82 @@
+# app/security.py
+
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from app import metrics
+
+# bcrypt cost; raising it makes existing hashes "deprecated" so they are
+# transparently re-hashed on the user's next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt releases the GIL, so a thread pool hashes on all cores without
+# blocking the event loop. Beyond HASH_MAX_PENDING queued+running jobs we
+# answer 429 instead of letting a login storm starve every other endpoint.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_WORKERS * 16)))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor: ThreadPoolExecutor | None = None
+_pending = 0
+_rejected = 0
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the bcrypt pool, creating it on first use (and again after
+    shutdown(), e.g. for the next lifespan in the same process).
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+async def _run(operation: str, fn, *args):
+    global _pending, _rejected
+    if _pending >= HASH_MAX_PENDING:
+        _rejected += 1
+        raise HTTPException(
+            status_code=429,
+            detail="Too many sign-ins in progress, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+        metrics.password_hashes.observe(time.perf_counter() - start, operation)
+
+
+async def hash_password(password: str) -> str:
+    return await _run("hash", pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str):
+    """
+    Verify off the event loop. Returns (valid, new_hash) where new_hash is
+    set when the stored hash uses outdated cost parameters and should be replaced.
+    """
+    return await _run("verify", pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def stats() -> dict:
+    return {
+        "workers": HASH_WORKERS,
+        "pending": _pending,
+        "max_pending": HASH_MAX_PENDING,
+        "rejected": _rejected,
+    }
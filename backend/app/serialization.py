@@ -0,0 +1,159 @@
+# app/serialization.py
+#
+# Fast path for large list responses: select only the columns the response
+# schema exposes, turn rows straight into dicts, and encode with orjson.
+# This skips building ORM objects and validating each row through
+# response_model.
+
+import os
+import json
+from datetime import date
+from fastapi.responses import JSONResponse
+from app import models, schemas
+
+try:
+    import orjson  # optional; much faster than json.dumps
+except ImportError:
+    orjson = None
+
+# Endpoints that use the fast path (comma separated: flights, hotels,
+# bookings, catalog), or "none" to serialize everything through response_model
+FAST_SERIALIZATION = set(os.getenv("FAST_SERIALIZATION", "flights,hotels,bookings,catalog").split(","))
+
+
+def fast(endpoint: str) -> bool:
+    return endpoint in FAST_SERIALIZATION
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), default=_default).encode()
+
+
+def to_jsonable(content):
+    """
+    content with dates etc. turned into JSON types (as the cache stores it).
+    """
+    if orjson is not None:
+        return orjson.loads(orjson.dumps(content))
+    return json.loads(dumps(content))
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when it is installed.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class Projection:
+    """
+    The columns of model that schema exposes, in schema field order.
+    Schema fields with no column (e.g. Hotel.rate_per_night) get the
+    schema default, in their place in that order.
+    """
+
+    def __init__(self, model, schema):
+        table_columns = model.__table__.columns
+        self.columns = []
+        self.defaults = {}
+        self.int_keys = []  # Float columns the schema declares as int (Flight.price)
+        for name, field in schema.model_fields.items():
+            if name in table_columns:
+                self.columns.append(getattr(model, name))
+                if int in (field.annotation, *getattr(field.annotation, "__args__", ())) \
+                        and table_columns[name].type.python_type is float:
+                    self.int_keys.append(name)
+            else:
+                self.defaults[name] = field.get_default(call_default_factory=True)
+        self.keys = [c.key for c in self.columns]
+        # every field in schema order; to_dict fills in the column values
+        self._template = {name: self.defaults.get(name) for name in schema.model_fields}
+
+    def labeled(self, prefix: str):
+        # for joins: column labels that can't clash with the other table's
+        return [c.label(prefix + c.key) for c in self.columns]
+
+    def to_dict(self, values) -> dict:
+        row = self._template.copy()
+        row.update(zip(self.keys, values))
+        for key in self.int_keys:
+            if row[key] is not None:
+                row[key] = int(row[key])
+        return row
+
+
+FLIGHT = Projection(models.Flight, schemas.Flight)
+HOTEL = Projection(models.Hotel, schemas.Hotel)
+BOOKING_KEYS = ["id", "user_id", "flight_id", "hotel_id", "booking_date"]
+
+
+def rows_to_dicts(projection: Projection, rows) -> list[dict]:
+    return [projection.to_dict(row) for row in rows]
+
+
+def booking_rows_to_dicts(rows) -> list[dict]:
+    """
+    Rows of (booking columns, flight columns, hotel columns) as selected by
+    crud.get_booking_rows, nested like schemas.Booking.
+    """
+    n_booking, n_flight = len(BOOKING_KEYS), len(FLIGHT.keys)
+    result = []
+    for row in rows:
+        booking = dict(zip(BOOKING_KEYS, row[:n_booking]))
+        flight_values = row[n_booking:n_booking + n_flight]
+        hotel_values = row[n_booking + n_flight:]
+        booking["flight"] = FLIGHT.to_dict(flight_values) if booking["flight_id"] is not None else None
+        booking["hotel"] = HOTEL.to_dict(hotel_values) if booking["hotel_id"] is not None else None
+        result.append(booking)
+    return result
+
+
+# Hotel search results: SerpAPI properties are large (every image, nearby
+# places, review breakdowns...). By default the search endpoints return only
+# the fields schemas.HotelCreate keeps, plus what the booking UI needs.
+HOTEL_RESULT_FIELDS = ["name", "type", "link", "overall_rating", "reviews", "amenities",
+                       "images", "rate_per_night", "offer_id"]
+# Images kept per hotel in the compact result (thumbnails only)
+HOTEL_RESULT_IMAGES = int(os.getenv("HOTEL_RESULT_IMAGES", "3"))
+
+
+def parse_fields(fields: str | None) -> list[str] | None:
+    """
+    fields= query value -> list of top-level keys; None means the compact
+    default, ["*"] the raw properties.
+    """
+    if not fields:
+        return None
+    return [name.strip() for name in fields.split(",") if name.strip()] or None
+
+
+def _compact_hotel(prop: dict) -> dict:
+    hotel = {key: prop.get(key) for key in HOTEL_RESULT_FIELDS}
+    hotel["images"] = [
+        {"thumbnail": image["thumbnail"]}
+        for image in (prop.get("images") or [])[:HOTEL_RESULT_IMAGES] if image.get("thumbnail")
+    ]
+    return hotel
+
+
+def project_hotels(properties: list[dict], fields: str | None = None) -> list[dict]:
+    """
+    Hotel search results trimmed to fields (comma separated keys, or "*"
+    for everything), or to the compact default.
+    """
+    keys = parse_fields(fields)
+    if keys is None:
+        return [_compact_hotel(prop) for prop in properties]
+    if "*" in keys:
+        return properties
+    return [{key: prop[key] for key in keys if key in prop} for prop in properties]
@@ -1,27 +1,40 @@
-import requests
 import os
+import asyncio
+import logging
 from fastapi import HTTPException
 from datetime import date
 import httpx
-from dotenv import load_dotenv
 from sqlalchemy.orm import Session
-from app import models, schemas, crud
+from fastapi.encoders import jsonable_encoder
+from app import models, schemas, crud, catalog, idempotency, weather
+from app.streaming import JSONItemStream
+from app.resilience import upstreams
+from app.cache import get_cache, make_key, cache_ttl, STALE_TTLS
+from app.singleflight import search_singleflight
+from app.serialization import project_hotels
+from app.hotset import hot_searches, HOT_SET_INTERVAL
 from app.crud import delete_flight_booking as crud_delete_flight_booking
 from app.crud import delete_hotel_booking as crud_delete_hotel_booking
 from datetime import datetime
 
 
-
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 # Load API keys from environment variables
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
 
+# Max upstream searches a single batch request runs at once
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_SEARCHES = int(os.getenv("BATCH_MAX_SEARCHES", "50"))
+# Max bookings created or cancelled by one trip/batch request
+TRIP_MAX_ITEMS = int(os.getenv("TRIP_MAX_ITEMS", "20"))
+
 # API URLs
 
-SERPAPI_API_URL = "https://serpapi.com/search.json"
-WEATHER_API_URL = "http://api.openweathermap.org/data/2.5/forecast"
+# (overridable to point at a local fake upstream for testing/benchmarks)
+SERPAPI_API_URL = os.getenv("SERPAPI_API_URL", "https://serpapi.com/search.json")
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "http://api.openweathermap.org/data/2.5/forecast")
 
 def _normalize_date(s: str) -> str:
     """
@@ -36,15 +49,218 @@ def _normalize_date(s: str) -> str:
     raise HTTPException(400, detail=f"Invalid date format: {s!r}. Use YYYY-MM-DD.")
 
 
-def search_flights(origin: str, destination: str, departure_date: str, return_date: str = None):
+async def _cached(provider: str, key: str, fetch):
+    """
+    Return the cached result for key, or await fetch() and cache it
+    for the provider's TTL. Concurrent misses on the same key share a
+    single fetch. A stale result still inside its stale window is served
+    immediately while a background refresh replaces it. Errors are never cached.
+    """
+    hot_searches.record(key, provider, fetch)
+    entry = await get_cache().get(key)
+    if entry is None:
+        return await _fetch_and_store(provider, key, fetch)
+
+    value, seconds_left = entry
+    if seconds_left <= 0:
+        _refresh_in_background(provider, key, fetch)
+    return value
+
+
+async def _fetch_and_store(provider: str, key: str, fetch):
+    async def fetch_and_store():
+        value = await fetch()
+        await get_cache().set(key, value, cache_ttl(provider), STALE_TTLS[provider])
+        return value
+
+    return await search_singleflight.do(key, fetch_and_store)
+
+
+# Strong references so pending refreshes aren't garbage collected
+_background_refreshes: set = set()
+
+
+def _refresh_in_background(provider: str, key: str, fetch):
+    async def refresh():
+        try:
+            await _fetch_and_store(provider, key, fetch)
+        except Exception as e:
+            logger.warning("background refresh of %s failed: %s", key, e)
+
+    task = asyncio.ensure_future(refresh())
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
+
+
+async def _stream_cached(provider: str, key: str, fetch, stream, fallback):
+    """
+    Async generator version of _cached for the streaming endpoints: yields
+    a cached result's items at once, else the items of stream() as the
+    upstream response is parsed, and caches them once it completes. If the
+    upstream fails (5xx) before the first item, yields fallback()'s items
+    instead (the non-streaming search, with its retries and catalog); a
+    failure after that is raised as HTTPException(502).
+    """
+    hot_searches.record(key, provider, fetch)
+    entry = await get_cache().get(key)
+    if entry is None and search_singleflight.in_flight(key):
+        # someone is already fetching this search; share it rather than call again
+        value = await _fetch_and_store(provider, key, fetch)
+    elif entry is not None:
+        value, seconds_left = entry
+        if seconds_left <= 0:
+            _refresh_in_background(provider, key, fetch)
+    else:
+        value = None
+    if value is not None:
+        for item in value:
+            yield item
+        return
+
+    items = []
+    try:
+        async for item in stream():
+            items.append(item)
+            yield item
+    except (HTTPException, httpx.HTTPError, ValueError) as e:
+        if isinstance(e, HTTPException) and (items or e.status_code < 500):
+            raise
+        if items:
+            # too late to fall back; surfaces as the stream's "error" event
+            raise HTTPException(502, detail=f"{provider} search failed mid-stream: {e}") from e
+        logger.info("streaming %s failed before the first result, falling back: %s", key, e)
+        for item in await fallback():
+            yield item
+        return
+    await get_cache().set(key, items, cache_ttl(provider), STALE_TTLS[provider])
+
+
+async def prewarm_hot_searches():
     """
-    Searches for flights using SerpAPI (Google Flights).
+    Scheduler loop: keep the most-searched routes/cities in the cache by
+    refreshing each one that is missing or about to go stale before the next pass.
     """
+    while True:
+        await asyncio.sleep(HOT_SET_INTERVAL)
+        for key, provider, fetch in hot_searches.top():
+            entry = await get_cache().get(key)
+            if entry is not None and entry[1] > HOT_SET_INTERVAL:
+                continue
+            try:
+                await _fetch_and_store(provider, key, fetch)
+            except Exception as e:
+                logger.warning("pre-warming %s failed: %s", key, e)
+        hot_searches.decay()
+
+
+def _flight_search(origin: str, destination: str, departure_date: str, return_date: str = None):
+    return (
+        origin.strip().upper(), destination.strip().upper(),
+        _normalize_date(departure_date), _normalize_date(return_date) if return_date else None,
+    )
+
+
+async def search_flights(origin: str, destination: str, departure_date: str, return_date: str = None):
+    """
+    Searches for flights using SerpAPI (Google Flights), answering repeated
+    searches for the same route and dates from the search cache.
+    """
+    origin, destination, departure_date, return_date = _flight_search(origin, destination, departure_date, return_date)
+
+    async def fetch():
+        flights = await _fetch_flights(origin, destination, departure_date, return_date)
+        return await catalog.ingest_flights(flights, origin, destination, departure_date, return_date)
+
+    key = make_key("flights", origin, destination, departure_date, return_date, "USD")
+    try:
+        return await _cached("flights", key, fetch)
+    except HTTPException as e:
+        # upstream down: fall back to offers ingested by earlier searches
+        if e.status_code < 500:
+            raise
+        flights = await catalog.find_flights(origin, destination, departure_date, return_date)
+        if not flights:
+            raise
+        return flights
+
+
+async def stream_flights(origin: str, destination: str, departure_date: str, return_date: str = None):
+    """
+    search_flights as an async generator: each flight is yielded as soon as
+    its part of the SerpAPI response has arrived and been parsed.
+    """
+    origin, destination, departure_date, return_date = _flight_search(origin, destination, departure_date, return_date)
+
+    async def fetch():
+        flights = await _fetch_flights(origin, destination, departure_date, return_date)
+        return await catalog.ingest_flights(flights, origin, destination, departure_date, return_date)
+
+    async def stream():
+        parser = JSONItemStream(arrays=("best_flights", "other_flights"), objects=("search_metadata",))
+        google_flights_url, count = "", 0
+        async with upstreams["google_flights"].stream(SERPAPI_API_URL, _flight_params(origin, destination, departure_date, return_date)) as response:
+            if response.status_code != 200:
+                raise HTTPException(502, detail=f"SerpAPI flights error ({response.status_code})")
+            async for chunk in response.aiter_bytes():
+                flights = []
+                for section, value in parser.feed(chunk):
+                    if section == "search_metadata":
+                        if value.get("status") != "Success":
+                            raise HTTPException(status_code=404, detail=f"API Error: {value}")
+                        google_flights_url = value.get("google_flights_url", "")
+                    else:
+                        flight = _flight_summary(value, google_flights_url)
+                        if flight is not None:
+                            flights.append(flight)
+                count += len(flights)
+                for flight in await catalog.ingest_flights(flights, origin, destination, departure_date, return_date):
+                    yield flight
+        if not count:
+            raise HTTPException(status_code=404, detail=f"No flights found for {origin} to {destination} on {departure_date}")
+
+    key = make_key("flights", origin, destination, departure_date, return_date, "USD")
+    fallback = lambda: search_flights(origin, destination, departure_date, return_date)
+    async for flight in _stream_cached("flights", key, fetch, stream, fallback):
+        yield flight
+
+
+def _flight_summary(flight_option: dict, google_flights_url: str):
+    """
+    Our summary of one SerpAPI flight option, or None if it has no segments.
+    """
+    flight_segments = flight_option.get("flights", [])
+    if not flight_segments:
+        return None
+    return {
+        "total_duration": flight_option.get("total_duration", "N/A"),
+        "price": flight_option.get("price", "N/A"),
+        "airline": flight_segments[0].get("airline", "Unknown Airline"),
+        "flight_number": flight_segments[0].get("flight_number", "N/A"),
+        "departure_time": flight_segments[0].get("departure_airport", {}).get("time", "N/A"),
+        "arrival_time": flight_segments[-1].get("arrival_airport", {}).get("time", "N/A"),
+        "google_flights_url": google_flights_url
+    }
+
+
+def _iter_flights(results: dict):
+    """
+    Yield the flight summaries from a SerpAPI google_flights response,
+    best flights first, then other flights.
+    """
+    google_flights_url = results["search_metadata"].get("google_flights_url", "")
+    for section in ("best_flights", "other_flights"):
+        for flight_option in results.get(section, []):
+            flight = _flight_summary(flight_option, google_flights_url)
+            if flight is not None:
+                yield flight
+
+
+def _flight_params(origin: str, destination: str, departure_date: str, return_date: str = None) -> dict:
     # Check if API key is available
     if not SERPAPI_API_KEY:
         raise HTTPException(status_code=500, detail="SerpAPI key is missing. Please configure your environment variables.")
 
-    params = {
+    return {
         "engine": "google_flights",
         "departure_id": origin,
         "arrival_id": destination,
@@ -57,11 +273,13 @@ def search_flights(origin: str, destination: str, departure_date: str, return_da
         "type": "1",  # Round trip flights
         "sort_by": "2",  # Sort by price
         "deep_search": "true",
-        "no_cache": "true",
     }
 
+
+async def _fetch_flights(origin: str, destination: str, departure_date: str, return_date: str = None):
+    params = _flight_params(origin, destination, departure_date, return_date)
     try:
-        response = requests.get(SERPAPI_API_URL, params=params)
+        response = await upstreams["google_flights"].get(SERPAPI_API_URL, params)
         response.raise_for_status()  # Raise an error for HTTP errors
 
         results = response.json()
@@ -77,45 +295,12 @@ def search_flights(origin: str, destination: str, departure_date: str, return_da
         if not best_flights and not other_flights:
             raise HTTPException(status_code=404, detail=f"No flights found for {origin} to {destination} on {departure_date}")
 
-        all_flights = []
-
-        # Extract Best Flights
-        for flight_option in best_flights:
-            flight_segments = flight_option.get("flights", [])
-            if not flight_segments:
-                continue
-
-            flight_details = {
-                "total_duration": flight_option.get("total_duration", "N/A"),
-                "price": flight_option.get("price", "N/A"),
-                "airline": flight_segments[0].get("airline", "Unknown Airline"),
-                "flight_number": flight_segments[0].get("flight_number", "N/A"),
-                "departure_time": flight_segments[0].get("departure_airport", {}).get("time", "N/A"),
-                "arrival_time": flight_segments[-1].get("arrival_airport", {}).get("time", "N/A"),
-                "google_flights_url": results["search_metadata"].get("google_flights_url", "")
-            }
-            all_flights.append(flight_details)
-
-        # Extract Other Flights
-        for flight_option in other_flights:
-            flight_segments = flight_option.get("flights", [])
-            if not flight_segments:
-                continue
-
-            flight_details = {
-                "total_duration": flight_option.get("total_duration", "N/A"),
-                "price": flight_option.get("price", "N/A"),
-                "airline": flight_segments[0].get("airline", "Unknown Airline"),
-                "flight_number": flight_segments[0].get("flight_number", "N/A"),
-                "departure_time": flight_segments[0].get("departure_airport", {}).get("time", "N/A"),
-                "arrival_time": flight_segments[-1].get("arrival_airport", {}).get("time", "N/A"),
-                "google_flights_url": results["search_metadata"].get("google_flights_url", "")
-            }
-            all_flights.append(flight_details)
+        # Best flights first, then other flights
+        return list(_iter_flights(results))
 
-        return all_flights
-
-    except requests.RequestException as e:
+    except HTTPException:
+        raise
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Error fetching flight data: {str(e)}")
 
     except KeyError as e:
@@ -123,21 +308,72 @@ def search_flights(origin: str, destination: str, departure_date: str, return_da
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error occurred: {str(e)}")
 
-def search_hotels(
+async def search_hotels(
     query: str,
     check_in: str,
     check_out: str,
     adults: int = 2,
     currency: str = "USD"
 ):
+    query, ci, co, currency = _hotel_search(query, check_in, check_out, currency)
+
+    async def fetch():
+        properties = await _fetch_hotels(query, ci, co, adults, currency)
+        return await catalog.ingest_hotels(properties, query, ci, co, currency)
+
+    key = make_key("hotels", query.lower(), ci, co, adults, currency)
+    try:
+        return await _cached("hotels", key, fetch)
+    except HTTPException as e:
+        if e.status_code < 500:
+            raise
+        hotels = await catalog.find_hotels(query, ci, co)
+        if not hotels:
+            raise
+        return hotels
+
+
+def _hotel_search(query: str, check_in: str, check_out: str, currency: str):
+    # normalize user input into ISO yyyy-mm-dd
+    return " ".join(query.split()), _normalize_date(check_in), _normalize_date(check_out), currency.upper()
+
+
+async def stream_hotels(query: str, check_in: str, check_out: str, adults: int = 2, currency: str = "USD"):
+    """
+    search_hotels as an async generator: each property is yielded as soon
+    as its part of the SerpAPI response has arrived and been parsed.
+    """
+    query, ci, co, currency = _hotel_search(query, check_in, check_out, currency)
+
+    async def fetch():
+        properties = await _fetch_hotels(query, ci, co, adults, currency)
+        return await catalog.ingest_hotels(properties, query, ci, co, currency)
+
+    async def stream():
+        parser = JSONItemStream(arrays=("properties",))
+        async with upstreams["google_hotels"].stream(SERPAPI_API_URL, _hotel_params(query, ci, co, adults, currency)) as response:
+            if response.status_code != 200:
+                body = (await response.aread()).decode(errors="replace")
+                raise HTTPException(
+                    status_code=502 if response.status_code >= 500 else response.status_code,
+                    detail=f"SerpAPI hotels error ({response.status_code}): {body}"
+                )
+            async for chunk in response.aiter_bytes():
+                properties = [prop for _, prop in parser.feed(chunk)]
+                for prop in await catalog.ingest_hotels(properties, query, ci, co, currency):
+                    yield prop
+
+    key = make_key("hotels", query.lower(), ci, co, adults, currency)
+    fallback = lambda: search_hotels(query, ci, co, adults, currency)
+    async for prop in _stream_cached("hotels", key, fetch, stream, fallback):
+        yield prop
+
+
+def _hotel_params(query: str, ci: str, co: str, adults: int, currency: str) -> dict:
     if not SERPAPI_API_KEY:
         raise HTTPException(500, detail="SerpAPI_API_KEY is missing.")
 
-    # 1) normalize user input into ISO yyyy-mm-dd
-    ci = _normalize_date(check_in)
-    co = _normalize_date(check_out)
-
-    params = {
+    return {
         "engine": "google_hotels",
         "q": query,
         "check_in_date": ci,
@@ -149,8 +385,11 @@ def search_hotels(
         "api_key": SERPAPI_API_KEY,
     }
 
+
+async def _fetch_hotels(query: str, ci: str, co: str, adults: int, currency: str):
+    params = _hotel_params(query, ci, co, adults, currency)
     try:
-        resp = httpx.get(SERPAPI_API_URL, params=params, timeout=10.0)
+        resp = await upstreams["google_hotels"].get(SERPAPI_API_URL, params)
         if resp.status_code != 200:
             # bubble up SerpAPI’s own error, so you can debug
             raise HTTPException(
@@ -164,60 +403,189 @@ def search_hotels(
     except ValueError:
         raise HTTPException(502, detail="SerpAPI returned invalid JSON.")
     
-def book_flight(db: Session, user_id: str, flight_id: int):
+def _reserve(db: Session, model, item_id: int):
+    item = db.get(model, item_id)
+    if item is None:
+        db.rollback()
+        raise HTTPException(404, detail=f"{model.__name__} {item_id} not found")
+    # the read only short-circuits the sold-out case without taking a write
+    # lock; the conditional UPDATE is what actually decides
+    if getattr(item, crud.INVENTORY[model].key) == 0 or not crud.reserve_inventory(db, model, item_id):
+        db.rollback()
+        raise HTTPException(409, detail=f"{model.__name__} {item_id} is sold out")
+
+
+def _book_items(db: Session, user_id: str, items: list, idempotency_key: str = None):
+    """
+    Reserve one unit of inventory for each (Flight|Hotel, id) in items and
+    create their bookings in a single transaction: all of them or none.
+    With an idempotency key, a repeat of the same request returns the
+    stored response instead of booking again.
+    Returns the Bookings in item order, or the stored response (a list of
+    dicts) on a replay.
+    """
+    request_fingerprint = idempotency.fingerprint(user_id, [(model.__tablename__, item_id) for model, item_id in items])
+    if idempotency_key:
+        stored = idempotency.lookup(db, idempotency_key, request_fingerprint)
+        if stored is not None:
+            return stored
+
+    # lock rows in a fixed order so two trips over the same items can't deadlock
+    for model, item_id in sorted(items, key=lambda item: (item[0].__tablename__, item[1])):
+        _reserve(db, model, item_id)
+
+    db_bookings = [
+        crud.create_booking(db, schemas.BookingCreate(
+            user_id=user_id,
+            flight_id=item_id if model is models.Flight else None,
+            hotel_id=item_id if model is models.Hotel else None,
+        ), commit=False)
+        for model, item_id in items
+    ]
+    if idempotency_key:
+        response = [jsonable_encoder(schemas.Booking.model_validate(b, from_attributes=True)) for b in db_bookings]
+        stored = idempotency.commit_with_response(db, idempotency_key, request_fingerprint, 200, response)
+        if stored is not None:
+            return stored
+    else:
+        db.commit()
+    for db_booking in db_bookings:
+        db.refresh(db_booking)
+    return db_bookings
+
+
+def book_flight(db: Session, user_id: str, flight_id: int, idempotency_key: str = None):
     """
     Books a flight for the user.
     """
-    booking_data = schemas.BookingCreate(
-    user_id=user_id,
-    flight_id=flight_id,
-    hotel_id=None
-)
-    return crud.create_booking(db, booking_data)
+    return _book_items(db, user_id, [(models.Flight, flight_id)], idempotency_key)[0]
 
 
-def book_hotel(db: Session, user_id: str, hotel_id: int):
+def book_hotel(db: Session, user_id: str, hotel_id: int, idempotency_key: str = None):
     """
     Books a hotel for the user.
     """
-    booking_data = schemas.BookingCreate(
-    user_id=user_id,
-    flight_id=None,
-    hotel_id=hotel_id
-)
-    return crud.create_booking(db, booking_data)
+    return _book_items(db, user_id, [(models.Hotel, hotel_id)], idempotency_key)[0]
 
 
-def delete_flight_booking(db: Session, booking_id: int):
-    return crud_delete_flight_booking(db, booking_id)
+def book_trip(db: Session, user_id: str, items: list, idempotency_key: str = None):
+    """
+    Books several flights/hotels (a list of (Flight|Hotel, id)) at once.
+    """
+    if not items or len(items) > TRIP_MAX_ITEMS:
+        raise HTTPException(400, detail=f"A trip has 1-{TRIP_MAX_ITEMS} items.")
+    return _book_items(db, user_id, items, idempotency_key)
 
-def delete_hotel_booking(db: Session, booking_id: int):
-    return crud_delete_hotel_booking(db, booking_id)
 
-def get_weather(city_name: str):
+def cancel_bookings(db: Session, booking_ids: list[int], user_id: str = None):
+    """
+    Cancels every booking in booking_ids, or none of them if any is missing
+    (or not user_id's).
     """
-    Fetches a 5-day weather forecast for a given city using OpenWeather API.
+    if not booking_ids or len(booking_ids) > TRIP_MAX_ITEMS:
+        raise HTTPException(400, detail=f"Cancel 1-{TRIP_MAX_ITEMS} bookings at a time.")
+    cancelled = crud.delete_bookings(db, booking_ids, user_id)
+    if cancelled is None:
+        raise HTTPException(404, detail="One or more bookings not found; nothing was cancelled.")
+    return {"message": f"{cancelled} booking(s) cancelled", "cancelled": cancelled}
+
+
+def delete_flight_booking(db: Session, booking_id: int, user_id: str = None):
+    return crud_delete_flight_booking(db, booking_id, user_id)
+
+def delete_hotel_booking(db: Session, booking_id: int, user_id: str = None):
+    return crud_delete_hotel_booking(db, booking_id, user_id)
+
+async def get_weather(city_name: str, daily: bool = False):
     """
+    Fetches a 5-day weather forecast for a city or IATA code using the
+    OpenWeather API: the 3-hourly entries, or one summary per day.
+    """
+    forecast = await _forecast(city_name)
+    return weather.daily_summary(forecast) if daily else forecast["entries"]
+
+
+async def _forecast(city_name: str) -> dict:
+    # cached per resolved location, so "TLV" and "tel aviv" share an entry
+    location = weather.city_index.resolve(city_name)
+    key = make_key("forecast", weather.normalize(location))
+    return await _cached("weather", key, lambda: _fetch_weather(location))
+
+
+async def get_weather_many(city_names: list[str], daily: bool = False):
+    """
+    Forecasts for several cities at once, in request order. Each city
+    succeeds or fails on its own; the same location is fetched once.
+    """
+    if not city_names or len(city_names) > weather.WEATHER_MAX_CITIES:
+        raise HTTPException(400, detail=f"Ask for 1-{weather.WEATHER_MAX_CITIES} cities.")
+
+    async def one(city_name: str) -> dict:
+        result = {"city_name": city_name, "location": weather.city_index.resolve(city_name)}
+        try:
+            result["results"] = await get_weather(city_name, daily)
+            result["status_code"] = 200
+        except HTTPException as e:
+            result.update(status_code=e.status_code, error=e.detail)
+        return result
+
+    return await asyncio.gather(*(one(city_name) for city_name in city_names))
+
+
+async def _fetch_weather(location: str):
     try:
-        url = f"{WEATHER_API_URL}?q={city_name}&appid={WEATHER_API_KEY}&units=metric"
-        response = requests.get(url)
+        params = {"q": location, "appid": WEATHER_API_KEY, "units": "metric"}
+        response = await upstreams["openweather"].get(WEATHER_API_URL, params)
 
         if response.status_code != 200:
             raise HTTPException(status_code=500, detail="Failed to fetch weather data")
 
-        data = response.json()
-        forecast = [
-            {
-                "datetime": item.get("dt_txt", "N/A"),
-                "temperature": item.get("main", {}).get("temp", "N/A"),
-                "weather": item.get("weather", [{}])[0].get("description", "Unknown"),
-                "wind_speed": item.get("wind", {}).get("speed", "N/A"),
-                "humidity": item.get("main", {}).get("humidity", "N/A")
-            }
-            for item in data.get("list", [])
-        ]
-
-        return forecast
+        return weather.parse_forecast(response.json())
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error while fetching weather: {str(e)}")
+
+
+async def _run_search(index: int, spec, limit: asyncio.Semaphore) -> dict:
+    """
+    Run one batch spec through the regular search path and wrap its
+    outcome, so one failed leg doesn't fail the whole batch.
+    """
+    async with limit:
+        try:
+            if spec.type == "flight":
+                results = await search_flights(spec.origin, spec.destination, spec.departure_date, spec.return_date)
+            elif spec.type == "hotel":
+                results = await search_hotels(spec.destination, spec.check_in, spec.check_out, spec.adults, spec.currency)
+                results = project_hotels(results, spec.fields)
+            else:
+                results = await get_weather(spec.city_name, spec.daily)
+        except HTTPException as e:
+            return {"index": index, "type": spec.type, "status_code": e.status_code, "error": e.detail}
+        except Exception as e:
+            return {"index": index, "type": spec.type, "status_code": 500, "error": str(e)}
+    return {"index": index, "type": spec.type, "status_code": 200, "results": results}
+
+
+def search_batch(specs: list):
+    """
+    Fan a list of flight/hotel/weather specs out concurrently (at most
+    BATCH_CONCURRENCY at a time). Yields each result as it completes;
+    every result carries the index of its spec in the request.
+    """
+    if len(specs) > BATCH_MAX_SEARCHES:
+        raise HTTPException(400, detail=f"At most {BATCH_MAX_SEARCHES} searches per batch.")
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def results():
+        tasks = [asyncio.ensure_future(_run_search(i, spec, limit)) for i, spec in enumerate(specs)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return results()
@@ -0,0 +1,49 @@
+# app/singleflight.py
+
+import asyncio
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one upstream call.
+    Every caller waiting on a key receives the same result or exception.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.executed = 0
+        self.collapsed = 0
+
+    async def do(self, key: str, fetch):
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.collapsed += 1
+        # shield so one disconnecting client doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every waiter went away
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "executed": self.executed,
+            "collapsed": self.collapsed,
+        }
+
+
+search_singleflight = SingleFlight()
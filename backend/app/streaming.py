@@ -0,0 +1,133 @@
+# app/streaming.py
+
+import os
+import re
+import json
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+# Hotel properties are large, so they are sent a page at a time
+HOTELS_STREAM_PAGE_SIZE = int(os.getenv("HOTELS_STREAM_PAGE_SIZE", "5"))
+
+
+def encode_event(fmt: str, event: str, data) -> str:
+    """
+    Encode one event as an NDJSON line or a Server-Sent Event.
+    """
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+
+async def search_events(fmt: str, event: str, results, page_size: int = 1):
+    """
+    Emit a "start" event straight away, then the items of the async
+    iterable results as they arrive, one event per item (or per page of
+    page_size items), then "done". Errors after the headers have gone out
+    are sent as an "error" event.
+    """
+    yield encode_event(fmt, "start", {})
+    count, page = 0, []
+    try:
+        async for item in results:
+            count += 1
+            page.append(item)
+            if len(page) == page_size:
+                yield encode_event(fmt, event, page[0] if page_size == 1 else page)
+                page = []
+    except HTTPException as e:
+        yield encode_event(fmt, "error", {"status_code": e.status_code, "detail": e.detail})
+        return
+    if page:
+        yield encode_event(fmt, event, page)
+    yield encode_event(fmt, "done", {"count": count})
+
+
+_STRUCTURE = re.compile(rb'[][{}"]')
+_STRING_END = re.compile(rb'["\\]')
+
+
+class JSONItemStream:
+    """
+    Incremental reader for a JSON object that arrives in chunks. feed()
+    returns (key, value) for every element of the top-level arrays named in
+    arrays, and for the top-level objects named in objects, as soon as each
+    one is complete. Only the value being read is buffered.
+    """
+
+    def __init__(self, arrays=(), objects=()):
+        self.arrays = set(arrays)
+        self.objects = set(objects)
+        self._buffer = b""
+        self._pos = 0
+        self._depth = 0
+        self._string_start = None  # offset of the open string's quote
+        self._key = None  # the last string read directly inside the top-level object
+        self._array = None  # key of the array being read
+        self._capture = None  # (key, start offset) of the value being read
+
+    def feed(self, chunk: bytes) -> list[tuple]:
+        buffer = self._buffer + chunk
+        pos, items = self._pos, []
+        while True:
+            if self._string_start is not None:
+                match = _STRING_END.search(buffer, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group() == b"\\":
+                    pos += 1  # skip the escaped character
+                    continue
+                if self._depth == 1:
+                    self._key = json.loads(buffer[self._string_start:pos])
+                self._string_start = None
+                continue
+
+            match = _STRUCTURE.search(buffer, pos)
+            if match is None:
+                break
+            token, pos = match.group(), match.end()
+            if token == b'"':
+                self._string_start = pos - 1
+            elif token in b"[{":
+                self._depth += 1
+                if self._depth == 2 and token == b"[" and self._key in self.arrays:
+                    self._array = self._key
+                elif self._depth == 2 and token == b"{" and self._key in self.objects:
+                    self._capture = (self._key, pos - 1)
+                elif self._depth == 3 and self._array is not None:
+                    self._capture = (self._array, pos - 1)
+            else:
+                self._depth -= 1
+                if self._capture is not None and self._depth == (2 if self._array is not None else 1):
+                    key, start = self._capture
+                    items.append((key, json.loads(buffer[start:pos])))
+                    self._capture = None
+                elif self._depth == 1:
+                    self._array = None
+
+        # keep only what's still needed: the value being read, or an unfinished key
+        keep = min(p for p in (
+            pos, self._capture[1] if self._capture else None, self._string_start,
+        ) if p is not None)
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        if self._capture is not None:
+            self._capture = (self._capture[0], self._capture[1] - keep)
+        if self._string_start is not None:
+            self._string_start -= keep
+        return items
+
+
+def streaming_response(fmt: str, events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type=STREAM_MEDIA_TYPES[fmt],
+        # keep proxies (e.g. nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,124 @@
+# app/weather.py
+#
+# Weather helpers: resolve what the user typed (a city name or an IATA
+# airport code) to the location OpenWeather is asked about, turn an
+# OpenWeather 5-day/3-hour forecast into our entries, and summarize
+# entries per local day. Fetching and caching live in services.py.
+
+import os
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# IATA code -> city name; the same file the frontend ships
+WEATHER_CITY_INDEX = os.getenv("WEATHER_CITY_INDEX", os.path.join(
+    os.path.dirname(__file__), "..", "..", "vactionres-frontend", "src", "iata_to_city.json",
+))
+# Most cities /weather/multi accepts in one request
+WEATHER_MAX_CITIES = int(os.getenv("WEATHER_MAX_CITIES", "20"))
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+class CityIndex:
+    """
+    In-memory lookup of IATA codes and known city names, loaded on first use.
+    """
+
+    def __init__(self, path: str = WEATHER_CITY_INDEX):
+        self.path = path
+        self._by_code = None
+        self._by_name = None
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                mapping = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("city index %s not loaded, city names are passed through: %s", self.path, e)
+            mapping = {}
+        self._by_code = {code.upper(): " ".join(city.split()) for code, city in mapping.items() if city}
+        self._by_name = {normalize(city): city for city in self._by_code.values()}
+
+    def resolve(self, name: str) -> str:
+        """
+        The index's spelling of a known city, the city for an IATA code, or
+        else the input with its whitespace tidied (OpenWeather geocodes it).
+        City names win, so e.g. "Bath" is never read as a code.
+        """
+        if self._by_code is None:
+            self._load()
+        name = " ".join(name.split())
+        return self._by_name.get(normalize(name)) or self._by_code.get(name.upper()) or name
+
+    def stats(self) -> dict:
+        if self._by_code is None:
+            self._load()
+        return {"codes": len(self._by_code), "cities": len(self._by_name)}
+
+
+city_index = CityIndex()
+
+
+def parse_forecast(data: dict) -> dict:
+    """
+    OpenWeather forecast response -> {"city", "timezone", "entries"}.
+    Entries keep the fields /weather/ has always returned, plus the
+    3-hour precipitation (mm) and probability of precipitation.
+    """
+    entries = []
+    for item in data.get("list", []):
+        precipitation = (item.get("rain") or {}).get("3h", 0) + (item.get("snow") or {}).get("3h", 0)
+        entries.append({
+            "datetime": item.get("dt_txt", "N/A"),
+            "temperature": item.get("main", {}).get("temp", "N/A"),
+            "weather": item.get("weather", [{}])[0].get("description", "Unknown"),
+            "wind_speed": item.get("wind", {}).get("speed", "N/A"),
+            "humidity": item.get("main", {}).get("humidity", "N/A"),
+            "precipitation": round(precipitation, 2),
+            "pop": item.get("pop", 0),
+        })
+    city = data.get("city", {})
+    return {"city": city.get("name"), "timezone": city.get("timezone", 0), "entries": entries}
+
+
+def _numbers(entries: list[dict], key: str) -> list[float]:
+    return [e[key] for e in entries if isinstance(e.get(key), (int, float))]
+
+
+def daily_summary(forecast: dict) -> list[dict]:
+    """
+    Entries grouped by the location's local date: temperature min/max/mean,
+    total precipitation, highest chance of precipitation, and the most
+    frequent description.
+    """
+    offset = timedelta(seconds=forecast.get("timezone") or 0)
+    days = {}
+    for entry in forecast["entries"]:
+        try:
+            when = datetime.strptime(entry["datetime"], "%Y-%m-%d %H:%M:%S") + offset
+        except ValueError:
+            continue
+        days.setdefault(when.date().isoformat(), []).append(entry)
+
+    summary = []
+    for day, entries in sorted(days.items()):
+        temperatures = _numbers(entries, "temperature")
+        winds = _numbers(entries, "wind_speed")
+        summary.append({
+            "date": day,
+            "temp_min": min(temperatures, default=None),
+            "temp_max": max(temperatures, default=None),
+            "temp_mean": round(sum(temperatures) / len(temperatures), 1) if temperatures else None,
+            "precipitation": round(sum(_numbers(entries, "precipitation")), 2),
+            "pop_max": max(_numbers(entries, "pop"), default=0),
+            "wind_max": max(winds, default=None),
+            "weather": Counter(e["weather"] for e in entries).most_common(1)[0][0],
+            "entries": len(entries),
+        })
+    return summary
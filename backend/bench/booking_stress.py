@@ -0,0 +1,134 @@
+# bench/booking_stress.py
+#
+# Concurrency stress test for hotel booking against a running backend:
+# creates a hotel with --rooms rooms and fires --bookings concurrent
+# bookings at it, then checks that exactly --rooms succeeded and the hotel
+# ends at zero. A second phase sends --retries concurrent copies of one
+# request with the same Idempotency-Key and checks only one booking is made.
+#
+#   python -m bench.booking_stress --base-url http://localhost:8800 --rooms 50 --bookings 500
+#
+# tests/test_booking_concurrency.py checks the same two properties in the
+# test suite, in process; this script is for a deployed stack at scale.
+
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+from collections import Counter
+from datetime import date, timedelta
+import httpx
+
+
+async def create_user(client: httpx.AsyncClient) -> tuple[str, dict]:
+    """
+    Register and log in a user; returns its id and Authorization header.
+    """
+    username = f"stress-{uuid.uuid4().hex[:12]}"
+    response = await client.post("/users/", json={
+        "username": username, "email": f"{username}@bench.local", "password": "bench-password",
+    })
+    response.raise_for_status()
+    response = await client.post("/login/", data={"username": username, "password": "bench-password"})
+    response.raise_for_status()
+    body = response.json()
+    return body["user_id"], {"Authorization": f"Bearer {body['access_token']}"}
+
+
+async def create_hotel(client: httpx.AsyncClient, rooms: int) -> tuple[int, str]:
+    # a location of its own, so the hotel is easy to look up again
+    location = f"Stress City {uuid.uuid4().hex[:8]}"
+    day = date.today() + timedelta(days=30)
+    response = await client.post("/hotels/", json={
+        "name": "Stress Hotel", "location": location, "price": 100, "available_rooms": rooms,
+        "check_in_date": str(day), "check_out_date": str(day + timedelta(days=2)),
+    })
+    response.raise_for_status()
+    return response.json()["id"], location
+
+
+async def hotel_rooms(client: httpx.AsyncClient, location: str) -> int:
+    response = await client.get("/catalog/hotels", params={"location": location})
+    response.raise_for_status()
+    return response.json()[0]["available_rooms"]
+
+
+async def hotel_bookings(client: httpx.AsyncClient, users: list[tuple[str, dict]], hotel_id: int) -> int:
+    count = 0
+    for user_id, auth in users:
+        params = {"limit": 100}
+        while True:
+            response = await client.get(f"/bookings/{user_id}", params=params, headers=auth)
+            response.raise_for_status()
+            count += sum(b["hotel_id"] == hotel_id for b in response.json())
+            params["cursor"] = response.headers.get("x-next-cursor")
+            if not params["cursor"]:
+                break
+    return count
+
+
+async def book(client: httpx.AsyncClient, user: tuple[str, dict], hotel_id: int, key: str = None) -> httpx.Response:
+    headers = {**user[1], "Idempotency-Key": key} if key else user[1]
+    return await client.post("/bookings/hotels/", params={"hotel_id": hotel_id}, headers=headers)
+
+
+async def oversell_phase(client: httpx.AsyncClient, users: list[tuple[str, dict]], rooms: int, bookings: int) -> bool:
+    hotel_id, location = await create_hotel(client, rooms)
+    start = time.perf_counter()
+    responses = await asyncio.gather(
+        *(book(client, users[i % len(users)], hotel_id, key=str(uuid.uuid4())) for i in range(bookings)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+    statuses = Counter(r.status_code if isinstance(r, httpx.Response) else type(r).__name__ for r in responses)
+    left = await hotel_rooms(client, location)
+    booked = await hotel_bookings(client, users, hotel_id)
+
+    print(f"{bookings} concurrent bookings for {rooms} rooms in {elapsed:.2f}s "
+          f"({bookings / elapsed:.0f} req/s): {dict(statuses)}, booked: {booked}, rooms left: {left}")
+    # judged on what the database holds; a request lost in transport may still have booked
+    ok = booked == rooms and left == 0 and statuses[200] <= rooms
+    print("  no overselling" if ok else "  FAILED: bookings and inventory don't add up")
+    return ok
+
+
+async def idempotency_phase(client: httpx.AsyncClient, user: tuple[str, dict], retries: int) -> bool:
+    hotel_id, location = await create_hotel(client, retries)
+    key = str(uuid.uuid4())
+    responses = await asyncio.gather(*(book(client, user, hotel_id, key) for _ in range(retries)))
+    booking_ids = {r.json()["id"] for r in responses if r.status_code == 200}
+    replayed = sum(r.headers.get("idempotent-replayed") == "true" for r in responses)
+    left = await hotel_rooms(client, location)
+
+    print(f"{retries} concurrent retries with one Idempotency-Key: "
+          f"{len(booking_ids)} booking(s), {replayed} replayed, rooms used: {retries - left}")
+    ok = len(booking_ids) == 1 and retries - left == 1 and all(r.status_code == 200 for r in responses)
+    print("  booked exactly once" if ok else "  FAILED: retries were not idempotent")
+    return ok
+
+
+async def run(args) -> bool:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        users = [await create_user(client) for _ in range(args.users)]
+        ok = await oversell_phase(client, users, args.rooms, args.bookings)
+        ok = await idempotency_phase(client, users[0], args.retries) and ok
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress test concurrent hotel booking.")
+    parser.add_argument("--base-url", default="http://localhost:8800")
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--bookings", type=int, default=500, help="concurrent booking attempts (> rooms)")
+    parser.add_argument("--retries", type=int, default=20, help="concurrent copies of the idempotent request")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=200, help="max open connections")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args(argv)
+    return 0 if asyncio.run(run(args)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
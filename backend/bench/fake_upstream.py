@@ -0,0 +1,201 @@
+# bench/fake_upstream.py
+#
+# Local stand-in for serpapi.com/search.json and the OpenWeather forecast API,
+# so the backend can be load-tested without spending real quota.
+#
+#   uvicorn bench.fake_upstream:app --port 9000
+#
+# then start the backend with
+#   SERPAPI_API_URL=http://localhost:9000/search.json
+#   WEATHER_API_URL=http://localhost:9000/data/2.5/forecast
+#   SERPAPI_API_KEY=fake WEATHER_API_KEY=fake
+
+import os
+import json
+import math
+import random
+import asyncio
+from datetime import datetime, timedelta
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Latency is lognormal around the median, per engine (seconds)
+LATENCY_MEDIAN = {
+    "google_flights": float(os.getenv("FAKE_FLIGHTS_LATENCY", "2.0")),
+    "google_hotels": float(os.getenv("FAKE_HOTELS_LATENCY", "0.8")),
+    "weather": float(os.getenv("FAKE_WEATHER_LATENCY", "0.15")),
+}
+LATENCY_SIGMA = float(os.getenv("FAKE_LATENCY_SIGMA", "0.5"))
+# Fraction of requests answered with a 503 / never answered in time
+ERROR_RATE = float(os.getenv("FAKE_ERROR_RATE", "0"))
+HANG_RATE = float(os.getenv("FAKE_HANG_RATE", "0"))
+HANG_SECONDS = float(os.getenv("FAKE_HANG_SECONDS", "60"))
+# Spread SerpAPI response bodies over this many seconds (0 = send at once),
+# to see the streaming endpoints emit results before the body has arrived
+TRANSFER_SECONDS = float(os.getenv("FAKE_TRANSFER_SECONDS", "0"))
+TRANSFER_CHUNKS = 20
+
+# Payload sizes, modeled on typical real responses
+BEST_FLIGHTS = int(os.getenv("FAKE_BEST_FLIGHTS", "3"))
+OTHER_FLIGHTS = int(os.getenv("FAKE_OTHER_FLIGHTS", "60"))
+HOTEL_PROPERTIES = int(os.getenv("FAKE_HOTEL_PROPERTIES", "20"))
+
+AIRLINES = ["El Al", "United", "Delta", "Lufthansa", "Turkish Airlines", "Wizz Air", "Aegean"]
+
+app = FastAPI()
+stats = {"requests": 0, "errors": 0, "hangs": 0}
+
+
+async def _simulate(engine: str):
+    """
+    Sleep for a sampled latency and decide whether to fail this request.
+    Returns an error response, or None to answer normally.
+    """
+    stats["requests"] += 1
+    roll = random.random()
+    if roll < HANG_RATE:
+        stats["hangs"] += 1
+        await asyncio.sleep(HANG_SECONDS)
+    await asyncio.sleep(LATENCY_MEDIAN[engine] * math.exp(random.gauss(0, LATENCY_SIGMA)))
+    if roll < HANG_RATE + ERROR_RATE:
+        stats["errors"] += 1
+        return JSONResponse({"error": "Injected upstream failure."}, status_code=503)
+    return None
+
+
+def _airport(code: str, when: datetime) -> dict:
+    return {"name": f"{code} International Airport", "id": code, "time": when.strftime("%Y-%m-%d %H:%M")}
+
+
+def _flight_option(origin: str, destination: str, day: str) -> dict:
+    depart = datetime.strptime(day, "%Y-%m-%d") + timedelta(minutes=random.randrange(0, 24 * 60, 5))
+    segments, total = [], 0
+    legs = random.choice([1, 1, 2])
+    stops = [origin] + [random.choice(["IST", "ATH", "FRA", "VIE"]) for _ in range(legs - 1)] + [destination]
+    for a, b in zip(stops, stops[1:]):
+        duration = random.randint(60, 11 * 60)
+        arrive = depart + timedelta(minutes=duration)
+        airline = random.choice(AIRLINES)
+        segments.append({
+            "departure_airport": _airport(a, depart),
+            "arrival_airport": _airport(b, arrive),
+            "duration": duration,
+            "airplane": "Boeing 787",
+            "airline": airline,
+            "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/LY.png",
+            "travel_class": "Economy",
+            "flight_number": f"{airline[:2].upper()} {random.randint(1, 999)}",
+            "legroom": "31 in",
+            "extensions": ["Average legroom (31 in)", "Wi-Fi for a fee", "In-seat power & USB outlets"],
+        })
+        total += duration + 90
+        depart = arrive + timedelta(minutes=90)
+    return {
+        "flights": segments,
+        "total_duration": total,
+        "carbon_emissions": {"this_flight": 512000, "typical_for_this_route": 498000},
+        "price": random.randint(180, 1800),
+        "type": "Round trip",
+        "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/multi.png",
+        "departure_token": "W1siVExWIiwiMjAyNS0wNi0yMiJdXQ" * 4,
+    }
+
+
+def _hotel_property(query: str, i: int) -> dict:
+    price = random.randint(60, 600)
+    return {
+        "type": "hotel",
+        "name": f"{query.title()} Hotel {i}",
+        "description": "Modern rooms, rooftop pool and free breakfast near the old town.",
+        "link": f"https://example.com/hotels/{i}",
+        "gps_coordinates": {"latitude": 41.9 + random.random(), "longitude": 12.4 + random.random()},
+        "check_in_time": "3:00 PM",
+        "check_out_time": "11:00 AM",
+        "rate_per_night": {"lowest": f"${price}", "extracted_lowest": price},
+        "total_rate": {"lowest": f"${price * 3}", "extracted_lowest": price * 3},
+        "nearby_places": [
+            {"name": f"Landmark {j}", "transportations": [{"type": "Walking", "duration": f"{j * 4} min"}]}
+            for j in range(1, 6)
+        ],
+        "hotel_class": f"{random.randint(2, 5)}-star hotel",
+        "images": [
+            {"thumbnail": f"https://example.com/img/{i}/{j}_t.jpg", "original_image": f"https://example.com/img/{i}/{j}.jpg"}
+            for j in range(12)
+        ],
+        "overall_rating": round(random.uniform(3, 5), 1),
+        "reviews": random.randint(10, 5000),
+        "ratings": [{"stars": s, "count": random.randint(0, 900)} for s in range(5, 0, -1)],
+        "reviews_breakdown": [
+            {"name": n, "description": n, "total_mentioned": 400, "positive": 300, "negative": 60, "neutral": 40}
+            for n in ("Location", "Service", "Room", "Breakfast", "Cleanliness")
+        ],
+        "amenities": ["Free Wi-Fi", "Pool", "Air conditioning", "Breakfast", "Fitness centre", "Bar"],
+        "property_token": f"ChcI{i:06d}" * 3,
+    }
+
+
+@app.get("/search.json")
+async def serpapi_search(request: Request):
+    params = request.query_params
+    engine = params.get("engine", "google_flights")
+    error = await _simulate(engine)
+    if error:
+        return error
+
+    metadata = {"id": "fake", "status": "Success", "google_flights_url": "https://www.google.com/travel/flights"}
+    if engine == "google_hotels":
+        query = params.get("q", "hotel")
+        return _send({"search_metadata": metadata, "properties": [_hotel_property(query, i) for i in range(HOTEL_PROPERTIES)]})
+
+    origin, destination = params.get("departure_id", "TLV"), params.get("arrival_id", "JFK")
+    day = params.get("outbound_date") or datetime.utcnow().strftime("%Y-%m-%d")
+    return _send({
+        "search_metadata": metadata,
+        "best_flights": [_flight_option(origin, destination, day) for _ in range(BEST_FLIGHTS)],
+        "other_flights": [_flight_option(origin, destination, day) for _ in range(OTHER_FLIGHTS)],
+    })
+
+
+def _send(body: dict):
+    if not TRANSFER_SECONDS:
+        return body
+    data = json.dumps(body).encode()
+    size = -(-len(data) // TRANSFER_CHUNKS)
+
+    async def chunks():
+        for start in range(0, len(data), size):
+            yield data[start:start + size]
+            await asyncio.sleep(TRANSFER_SECONDS / TRANSFER_CHUNKS)
+
+    return StreamingResponse(chunks(), media_type="application/json")
+
+
+@app.get("/data/2.5/forecast")
+async def weather_forecast(q: str = "London"):
+    error = await _simulate("weather")
+    if error:
+        return error
+
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    entries = []
+    for i in range(40):  # 5 days of 3-hourly entries, like the real API
+        when = start + timedelta(hours=3 * i)
+        description = random.choice(["clear sky", "few clouds", "light rain"])
+        entry = {
+            "dt": int(when.timestamp()),
+            "main": {"temp": round(random.uniform(10, 32), 2), "temp_min": 9.5, "temp_max": 33.1, "humidity": random.randint(30, 90)},
+            "weather": [{"id": 800, "main": "Clear", "description": description}],
+            "clouds": {"all": random.randint(0, 100)},
+            "wind": {"speed": round(random.uniform(0, 12), 2), "deg": random.randint(0, 359)},
+            "pop": round(random.random(), 2),
+            "dt_txt": when.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if description == "light rain":
+            entry["rain"] = {"3h": round(random.uniform(0.1, 3), 2)}
+        entries.append(entry)
+    return {"cod": "200", "cnt": 40, "list": entries, "city": {"name": q, "country": "XX", "timezone": 7200}}
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
@@ -0,0 +1,218 @@
+# bench/loadtest.py
+#
+# Closed-loop load test against a running backend. Reports RPS and
+# p50/p95/p99 per endpoint, and can save/compare against a baseline.
+#
+#   python -m bench.loadtest --base-url http://localhost:8800 --duration 30 \
+#       --concurrency 50 --output bench/results/after.json --baseline bench/results/before.json
+#
+# Point the backend at bench/fake_upstream.py first so searches don't
+# hit the real SerpAPI/OpenWeather.
+
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from datetime import date, timedelta
+import httpx
+
+ROUTES = [("TLV", "JFK"), ("TLV", "LHR"), ("TLV", "CDG"), ("JFK", "LAX"), ("LHR", "FCO"), ("TLV", "ATH")]
+CITIES = ["Rome", "Paris", "London", "New York", "Athens", "Barcelona", "Berlin", "Tel Aviv"]
+
+# scenario name -> relative weight in the "mixed" workload
+SCENARIO_WEIGHTS = {
+    "login": 1,
+    "search_flights": 3,
+    "search_hotels": 2,
+    "weather": 2,
+    "book": 1,
+    "list_bookings": 4,
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, name: str, seconds: float, ok: bool):
+        self.latencies[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    def report(self, elapsed: float) -> dict:
+        report = {}
+        for name, samples in sorted(self.latencies.items()):
+            samples.sort()
+            pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+            report[name] = {
+                "count": len(samples),
+                "errors": self.errors[name],
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(pick(0.50), 2),
+                "p95_ms": round(pick(0.95), 2),
+                "p99_ms": round(pick(0.99), 2),
+            }
+        return report
+
+
+class Session:
+    """
+    One virtual user: registered once during setup, then runs scenarios.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, unique_searches: int):
+        self.client = client
+        self.recorder = recorder
+        self.unique_searches = unique_searches
+        self.username = f"bench-{uuid.uuid4().hex[:12]}"
+        self.password = "bench-password"
+        self.user_id = None
+        self.headers = {}  # Authorization: Bearer <access token from the last login>
+        self.flight_id = None
+        self.hotel_id = None
+
+    async def timed(self, name: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.recorder.add(name, time.perf_counter() - start, ok)
+        return response
+
+    async def setup(self):
+        await self.client.post("/users/", json={
+            "username": self.username, "email": f"{self.username}@bench.local", "password": self.password,
+        })
+        await self.login()
+        day = date.today() + timedelta(days=30)
+        flight = await self.client.post("/flights/", json={
+            "departure_id": "TLV", "arrival_id": "JFK", "outbound_date": str(day),
+            "return_date": str(day + timedelta(days=7)), "price": 650, "airline": "El Al",
+            "flight_number": f"LY {random.randint(1, 999)}",
+        })
+        hotel = await self.client.post("/hotels/", json={
+            "name": f"Bench Hotel {self.username}", "location": "Rome", "price": 120, "available_rooms": 1_000_000,
+            "check_in_date": str(day), "check_out_date": str(day + timedelta(days=3)),
+        })
+        self.flight_id = flight.json()["id"]
+        self.hotel_id = hotel.json()["id"]
+
+    async def login(self):
+        response = await self.timed("POST /login/", "POST", "/login/", data={
+            "username": self.username, "password": self.password,
+        })
+        if response is not None and response.status_code == 200:
+            body = response.json()
+            self.user_id = body["user_id"]
+            self.headers = {"Authorization": f"Bearer {body['access_token']}"}
+
+    def _search_seed(self) -> random.Random:
+        # a small pool of distinct searches models popular routes (cache hits)
+        return random.Random(random.randrange(self.unique_searches))
+
+    async def search_flights(self):
+        seed = self._search_seed()
+        origin, destination = seed.choice(ROUTES)
+        day = date.today() + timedelta(days=seed.randint(7, 90))
+        await self.timed("GET /search_flights/", "GET", "/search_flights/", params={
+            "origin": origin, "destination": destination,
+            "departure_date": str(day), "return_date": str(day + timedelta(days=7)),
+        })
+
+    async def search_hotels(self):
+        seed = self._search_seed()
+        day = date.today() + timedelta(days=seed.randint(7, 90))
+        await self.timed("GET /search-hotels", "GET", "/search-hotels", params={
+            "destination": seed.choice(CITIES), "check_in": str(day), "check_out": str(day + timedelta(days=3)),
+        })
+
+    async def weather(self):
+        await self.timed("GET /weather/", "GET", "/weather/", params={"city_name": self._search_seed().choice(CITIES)})
+
+    async def book(self):
+        if random.random() < 0.5:
+            await self.timed("POST /bookings/flights/", "POST", "/bookings/flights/",
+                             params={"flight_id": self.flight_id}, headers=self.headers)
+        else:
+            await self.timed("POST /bookings/hotels/", "POST", "/bookings/hotels/",
+                             params={"hotel_id": self.hotel_id}, headers=self.headers)
+
+    async def list_bookings(self):
+        await self.timed("GET /bookings/{user_id}", "GET", f"/bookings/{self.user_id}", headers=self.headers)
+
+
+async def run(args) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        sessions = [Session(client, recorder, args.unique_searches) for _ in range(args.concurrency)]
+        await asyncio.gather(*(s.setup() for s in sessions))
+        recorder.latencies.clear()
+        recorder.errors.clear()
+
+        scenarios = list(SCENARIO_WEIGHTS) if args.scenario == "mixed" else [args.scenario]
+        weights = [SCENARIO_WEIGHTS[s] for s in scenarios]
+        deadline = time.perf_counter() + args.duration
+
+        async def worker(session: Session):
+            while time.perf_counter() < deadline:
+                await getattr(session, random.choices(scenarios, weights)[0])()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(s) for s in sessions))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "elapsed_seconds": round(elapsed, 2),
+        "endpoints": recorder.report(elapsed),
+    }
+
+
+def print_report(result: dict, baseline: dict | None):
+    header = f"{'endpoint':28} {'count':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, row in result["endpoints"].items():
+        print(f"{name:28} {row['count']:>7} {row['errors']:>5} {row['rps']:>8} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+        old = (baseline or {}).get("endpoints", {}).get(name)
+        if old:
+            delta = lambda k: f"{(row[k] - old[k]) / old[k] * 100:+.1f}%" if old[k] else "n/a"
+            print(f"{'  vs baseline':28} {'':>7} {'':>5} {delta('rps'):>8} "
+                  f"{delta('p50_ms'):>9} {delta('p95_ms'):>9} {delta('p99_ms'):>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Vactionres API.")
+    parser.add_argument("--base-url", default="http://localhost:8800")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load after setup")
+    parser.add_argument("--concurrency", type=int, default=20, help="number of virtual users")
+    parser.add_argument("--scenario", default="mixed", choices=["mixed", *SCENARIO_WEIGHTS])
+    parser.add_argument("--unique-searches", type=int, default=50,
+                        help="distinct search queries in the pool (smaller = more cache hits)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
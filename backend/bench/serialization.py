@@ -0,0 +1,104 @@
+# bench/serialization.py
+#
+# CPU cost per response of the large list endpoints, with the fast
+# serialization path (app/serialization.py) on and off. Runs the app
+# in-process against a throwaway SQLite database; no server needed.
+#
+#   python -m bench.serialization --rows 2000 --limit 100 --requests 200
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+AMENITIES = ["Free Wi-Fi", "Pool", "Spa", "Bar", "Gym", "Parking", "Breakfast", "Air conditioning"]
+
+
+def seed(client, rows: int) -> str:
+    day = date.today() + timedelta(days=30)
+    client.post("/flights/bulk", json=[{
+        "departure_id": "TLV", "arrival_id": random.choice(["JFK", "LHR", "CDG"]),
+        "outbound_date": str(day), "return_date": str(day + timedelta(days=7)),
+        "price": random.randint(200, 1500), "airline": random.choice(["El Al", "Delta", "BA"]),
+        "flight_number": f"F{i}", "departure_time": "2025-01-01 10:00", "arrival_time": "2025-01-01 18:00",
+        "total_duration": random.randint(120, 900), "google_flights_url": "https://www.google.com/travel/flights",
+        "available_seats": 100,
+    } for i in range(rows)]).raise_for_status()
+    client.post("/hotels/bulk", json=[{
+        "name": f"Hotel {i}", "location": random.choice(["Rome", "Paris", "London"]),
+        "price": random.randint(50, 600), "available_rooms": 100,
+        "check_in_date": str(day), "check_out_date": str(day + timedelta(days=3)),
+        "link": f"https://example.com/hotels/{i}", "overall_rating": round(random.uniform(3, 5), 1),
+        "reviews": random.randint(0, 5000), "amenities": random.sample(AMENITIES, 5),
+        "images": [{"thumbnail": f"https://example.com/{i}/{j}.jpg", "original_image": f"https://example.com/{i}/{j}_o.jpg"}
+                   for j in range(4)],
+    } for i in range(rows)]).raise_for_status()
+
+    client.post("/users/", json={
+        "username": "bench", "email": "bench@bench.local", "password": "bench-password",
+    }).raise_for_status()
+    login = client.post("/login/", data={"username": "bench", "password": "bench-password"}).json()
+    user_id = login["user_id"]
+    client.headers["Authorization"] = f"Bearer {login['access_token']}"
+    for i in range(1, min(rows, 100) + 1):
+        client.post("/bookings/trip", json={"items": [
+            {"type": "flight", "id": i}, {"type": "hotel", "id": i},
+        ]}).raise_for_status()
+    return user_id
+
+
+def measure(client, url: str, params: dict, requests: int, before_each=None) -> float:
+    """
+    Mean process CPU milliseconds per request.
+    """
+    client.get(url, params=params).raise_for_status()  # warm up
+    start = time.process_time()
+    for _ in range(requests):
+        if before_each:
+            before_each()
+        client.get(url, params=params).raise_for_status()
+    return (time.process_time() - start) * 1000 / requests
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CPU per response, fast serialization on vs off.")
+    parser.add_argument("--rows", type=int, default=2000, help="flights and hotels in the catalog")
+    parser.add_argument("--limit", type=int, default=100, help="page size requested")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and mode")
+    args = parser.parse_args(argv)
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("AUTH_SECRET", os.urandom(32).hex())
+    from fastapi.testclient import TestClient
+    import main as app_main
+    from app import serialization, bookings_cache
+
+    def no_bookings_cache():
+        bookings_cache._cache = None  # measure the database + serialization path, not cache hits
+
+    with TestClient(app_main.app) as client:
+        random.seed(1)
+        user_id = seed(client, args.rows)
+        endpoints = [
+            ("GET /flights/", "/flights/", {"limit": args.limit}, None),
+            ("GET /hotels/", "/hotels/", {"limit": args.limit}, None),
+            ("GET /catalog/hotels", "/catalog/hotels", {"limit": args.limit, "sort": "rating"}, None),
+            ("GET /bookings/{user_id}", f"/bookings/{user_id}", {"limit": args.limit}, no_bookings_cache),
+        ]
+        enabled = set(serialization.FAST_SERIALIZATION)
+        print(f"{'endpoint':26} {'response_model':>15} {'fast path':>10} {'speedup':>8}   (CPU ms/response)")
+        for name, url, params, before_each in endpoints:
+            serialization.FAST_SERIALIZATION = set()
+            slow = measure(client, url, params, args.requests, before_each)
+            serialization.FAST_SERIALIZATION = {"flights", "hotels", "catalog", "bookings"}
+            quick = measure(client, url, params, args.requests, before_each)
+            print(f"{name:26} {slow:15.2f} {quick:10.2f} {slow / quick:7.1f}x")
+        serialization.FAST_SERIALIZATION = enabled
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# bench/startup.py
+#
+# Cold start: how long importing the app takes, and how long until a fresh
+# server answers its first request, for each launch mode. Uses a throwaway
+# SQLite database; no upstreams needed.
+#
+#   python -m bench.startup --runs 5
+
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import tempfile
+import statistics
+import subprocess
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+# What a forked gunicorn worker still does itself: run the lifespan startup
+LIFESPAN_SNIPPET = """
+import time, asyncio, main
+from app import http_client
+if {preload}:
+    http_client.preload()
+async def startup():
+    t = time.perf_counter()
+    async with main.lifespan(main.app):
+        print(time.perf_counter() - t)
+asyncio.run(startup())
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_import(env: dict) -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_lifespan(env: dict, preload: bool) -> float:
+    snippet = LIFESPAN_SNIPPET.format(preload=preload)
+    out = subprocess.run([sys.executable, "-c", snippet], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_to_ready(command: list[str], env: dict, port: int, limit: float = 60) -> float:
+    """
+    Seconds from spawning command until GET / on port answers 200.
+    """
+    start = time.perf_counter()
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              start_new_session=True)
+    try:
+        while time.perf_counter() - start < limit:
+            if server.poll() is not None:
+                raise RuntimeError(f"{command[0]} exited with {server.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/", timeout=0.5).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"{command[0]} not ready after {limit}s")
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import time and time-to-first-response per launch mode.")
+    parser.add_argument("--runs", type=int, default=5, help="samples per measurement (median reported)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="gunicorn workers")
+    args = parser.parse_args(argv)
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}", "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("AUTH_SECRET", os.urandom(32).hex())
+    subprocess.run([sys.executable, "-m", "app.migrations"], env=env, check=True, capture_output=True)
+
+    def median(fn) -> float:
+        return statistics.median(fn() for _ in range(args.runs))
+
+    print(f"{'measurement':48} {'median s':>9}")
+    print(f"{'import main':48} {median(lambda: time_import(env)):9.3f}")
+    worker_env = {**env, "DB_AUTO_MIGRATE": "false"}
+    print(f"{'lifespan startup':48} {median(lambda: time_lifespan(worker_env, False)):9.3f}")
+    print(f"{'lifespan startup, worker of a preloaded master':48} {median(lambda: time_lifespan(worker_env, True)):9.3f}")
+
+    modes = [
+        ("uvicorn, schema upgraded in lifespan", ["uvicorn", "main:app"], {"DB_AUTO_MIGRATE": "true"}),
+        ("uvicorn, schema upgraded beforehand", ["uvicorn", "main:app"], {"DB_AUTO_MIGRATE": "false"}),
+        (f"gunicorn preload, {args.workers} workers", ["gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+         {"WEB_CONCURRENCY": str(args.workers)}),
+    ]
+    for name, command, extra_env in modes:
+        def ready():
+            port = free_port()
+            if command[0] == "uvicorn":
+                full_command = [sys.executable, "-m", *command, "--port", str(port)]
+            else:
+                full_command = [sys.executable, "-m", *command, "--bind", f"127.0.0.1:{port}"]
+            return time_to_ready(full_command, {**env, **extra_env}, port)
+
+        try:
+            print(f"{'first response: ' + name:48} {median(ready):9.3f}")
+        except (RuntimeError, FileNotFoundError) as e:
+            print(f"{'first response: ' + name:48} {'n/a':>9}  ({e})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+# gunicorn.conf.py
+#
+# Production launch:  gunicorn -c gunicorn.conf.py main:app
+#
+# The app is imported once in the master (preload_app) and forked into
+# uvicorn workers, one per CPU by default, so a worker starts in
+# milliseconds instead of re-importing everything. The schema is upgraded
+# once in the master before any worker is forked.
+#
+# Workers share nothing but the database (and Redis, if configured): offers
+# are committed before their offer_ids are returned and cached booking
+# pages are keyed on a version column, so any worker can serve any request.
+
+import os
+import multiprocessing
+
+# workers must not each upgrade the schema (read by app.migrations on import)
+os.environ.setdefault("DB_AUTO_MIGRATE", "false")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8800')}"
+# async workers: one per core is enough to keep every core busy
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+try:
+    import uvicorn_worker  # noqa: F401
+    worker_class = "uvicorn_worker.UvicornWorker"
+except ImportError:  # older uvicorn ships the worker itself
+    worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Set to false when a separate release step runs python -m app.migrations
+DB_MIGRATE_ON_START = os.getenv("DB_MIGRATE_ON_START", "true").lower() == "true"
+
+
+def on_starting(server):
+    from app import http_client
+
+    http_client.preload()
+    if DB_MIGRATE_ON_START:
+        from app import migrations
+        from app.database import engine
+
+        migrations.upgrade(engine)
+        engine.dispose()
+
+
+def post_fork(server, worker):
+    # never share a connection opened in the master with a worker
+    from app.database import engine, async_engine
+
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
@@ -1,19 +1,73 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from dotenv import load_dotenv
+
+# .env is for local runs (containers get real env vars); load it before the
+# app modules read their settings
+load_dotenv()
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, Request, Header
 from sqlalchemy.orm import Session
 from app.services import search_flights, search_hotels, get_weather
 from app.database import SessionLocal, engine 
-from app import models, schemas, services ,crud
+from app import models, schemas, services ,crud, crud_async, security, migrations, bookings_cache, auth, google_auth
+from app.pagination import next_cursor, NEXT_CURSOR_HEADER
+from app.bulk import import_rows
+from app.crud_async import AnySession
+from app.http_client import get_client, close_client
+from app.cache import get_cache
+from app.singleflight import search_singleflight
+from app.hotset import hot_searches
+from app.resilience import upstreams
+from app.streaming import search_events, streaming_response, HOTELS_STREAM_PAGE_SIZE
+from app.catalog import catalog_writer, resolve_offer
+from app.weather import city_index
+from app.serialization import FastJSONResponse, fast, to_jsonable, rows_to_dicts, booking_rows_to_dicts, project_hotels, FLIGHT, HOTEL
+from app.compression import CompressionMiddleware
+from app import metrics
+from app.metrics import MetricsMiddleware, stats_collector
+from app.profiler import SQLProfilerMiddleware, PROFILE_HEADER, recent_profiles, get_profile, SQL_PROFILING
+from app.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, check_key, purge_expired_keys
+from contextlib import asynccontextmanager
+import asyncio
+import json
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, get_db
-from datetime import datetime
-from typing import Optional
-
+from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from app.database import engine, async_engine, get_session, pool_stats
+from datetime import datetime, date
+from typing import Optional, Literal
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema upgrade for local runs; production does it once before the
+    # workers start (see app/migrations.py)
+    if migrations.DB_AUTO_MIGRATE:
+        migrations.upgrade(engine)
+    # One pooled HTTP client for every upstream call, closed on shutdown
+    get_client()
+    prewarmer = None
+    if hot_searches.size:
+        prewarmer = asyncio.create_task(services.prewarm_hot_searches())
+    # Retries catalog writes that failed while the database was down
+    catalog_task = asyncio.create_task(catalog_writer.run())
+    idempotency_task = asyncio.create_task(purge_expired_keys())
+    yield
+    if prewarmer:
+        prewarmer.cancel()
+    catalog_task.cancel()
+    idempotency_task.cancel()
+    try:
+        await catalog_writer.flush()
+    except Exception:
+        pass
+    await close_client()
+    security.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
 
-# Create the database tables
-models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Allow frontend to access backend
 app.add_middleware(
@@ -22,9 +76,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REPLAYED_HEADER, "ETag", PROFILE_HEADER],
 )
+# gzip/brotli for large JSON bodies (search results, list pages)
+app.add_middleware(CompressionMiddleware)
+# per-request SQL statement counts when SQL_PROFILING is on
+app.add_middleware(SQLProfilerMiddleware)
+# outermost, so request latency includes compression
+app.add_middleware(MetricsMiddleware)
+
 
 
+def _set_next_cursor(response: Response, cursor: Optional[str]):
+    # list bodies stay plain arrays; the next page's cursor travels in a header
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def _fast_list(body: list, cursor: Optional[str]) -> FastJSONResponse:
+    # already shaped like the response_model, so it skips per-row validation
+    response = FastJSONResponse(body)
+    _set_next_cursor(response, cursor)
+    return response
+
 
 # User Endpoints
 @app.get("/")
@@ -32,70 +106,161 @@ def read_root():
     return {"message": "Welcome to our FastAPI reservation system!"}
 
 @app.post("/login/")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud.get_user(db, form_data.username)
-    if not user or not crud.verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AnySession = Depends(get_session)):
+    user = await crud_async.get_user(db, form_data.username)
+    if not user or not user.hashed_password:
+        raise HTTPException(status_code=400, detail="Invalid credentials")
+    # bcrypt runs in the bounded hashing pool, not on the event loop
+    valid, new_hash = await security.verify_password(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid credentials")
+    if new_hash:
+        await crud_async.update_password_hash(db, user, new_hash)
     
-    return {"message": "Login successful", "user_id": user.id, "email": user.email}
+    # signed tokens: later requests are verified in memory, not against the database
+    return {"message": "Login successful", "user_id": user.id, "email": user.email, **auth.issue_tokens(user)}
 
-@app.post("/users/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    return crud.create_user(db=db, user=user)
+@app.post("/token/refresh", response_model=schemas.Tokens)
+async def refresh_token(request: schemas.RefreshRequest, db: AnySession = Depends(get_session)):
+    return await auth.refresh(db, request.refresh_token)
 
-@app.post("/users/google/", response_model=schemas.User)
-def create_google_user(user: schemas.GoogleUserCreate, db: Session = Depends(get_db)):
-    return crud.create_google_user(db=db, user=user)
+@app.post("/users/", response_model=schemas.User)
+async def create_user(user: schemas.UserCreate, db: AnySession = Depends(get_session)):
+    hashed_pw = await security.hash_password(user.password)
+    return await crud_async.create_user(db, user, hashed_pw)
+
+@app.post("/users/google/", response_model=schemas.UserWithTokens)
+async def create_google_user(body: schemas.GoogleCredential, db: AnySession = Depends(get_session)):
+    # who this is comes from the verified token, never from the request body
+    claims = await google_auth.verify_id_token(body.credential)
+    user = schemas.GoogleUserCreate(id=claims["sub"], email=claims["email"], name=claims.get("name") or claims["email"])
+    db_user = await crud_async.create_google_user(db, user)
+    if db_user is None:
+        raise HTTPException(409, detail="An account with this email or name already exists.")
+    if db_user.hashed_password is not None:
+        raise HTTPException(409, detail="This account is not a Google account; log in with your password.")
+    return {**schemas.User.model_validate(db_user, from_attributes=True).model_dump(), **auth.issue_tokens(db_user)}
 
 
 # Hotel Endpoints
 @app.post("/hotels/", response_model=schemas.Hotel)
-def create_hotel(hotel: schemas.HotelCreate, db: Session = Depends(get_db)):
-    return crud.create_hotel(db=db, hotel=hotel)
+async def create_hotel(hotel: schemas.HotelCreate, db: AnySession = Depends(get_session)):
+    return await crud_async.create_hotel(db, hotel)
 
 
 @app.get("/hotels/", response_model=list[schemas.Hotel])
-def get_hotels(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return crud.get_hotels(db=db, skip=skip, limit=limit)
+async def get_hotels(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header"),
+    db: AnySession = Depends(get_session),
+):
+    if fast("hotels"):
+        rows = await crud_async.get_hotels(db, skip, limit, cursor, HOTEL.columns)
+        return _fast_list(rows_to_dicts(HOTEL, rows), next_cursor(rows, limit, lambda h: (h.price, h.id)))
+    hotels = await crud_async.get_hotels(db, skip, limit, cursor)
+    _set_next_cursor(response, next_cursor(hotels, limit, lambda h: (h.price, h.id)))
+    return hotels
+
+@app.post("/hotels/bulk")
+async def bulk_import_hotels(request: Request, db: AnySession = Depends(get_session)):
+    """
+    Upsert many hotels from a JSON array, NDJSON or CSV body, matched on
+    name + location + check_in_date. Invalid rows are reported, not fatal.
+    """
+    return await import_rows(
+        request, schemas.HotelCreate, ("name", "location", "check_in_date"),
+        lambda batch: crud_async.bulk_upsert_hotels(db, batch),
+    )
 
 @app.put("/hotels/{hotel_id}", response_model=schemas.Hotel)
-def update_hotel(hotel_id: int, hotel_data: schemas.HotelUpdate, db: Session = Depends(get_db)):
-    updated_hotel = crud.update_hotel(db, hotel_id, hotel_data)
+async def update_hotel(hotel_id: int, hotel_data: schemas.HotelUpdate, db: AnySession = Depends(get_session)):
+    updated_hotel = await crud_async.update_hotel(db, hotel_id, hotel_data)
     if not updated_hotel:
         raise HTTPException(status_code=404, detail="Hotel not found")
     return updated_hotel
 
 
 @app.get("/search-hotels")
-def search_hotels_endpoint(
+async def search_hotels_endpoint(
     destination: str,
     check_in: str,
     check_out: str,
     adults: int = 2,
-    currency: str = "USD"
+    currency: str = "USD",
+    fields: Optional[str] = Query(None, description='Comma-separated property keys to return, or "*" for the raw SerpAPI properties (default: a compact set)'),
 ):
     try:
-        props = services.search_hotels(destination, check_in, check_out, adults, currency)
+        props = await services.search_hotels(destination, check_in, check_out, adults, currency)
     except HTTPException as e:
         # if SerpAPI says “bad date format” or “no hotels”, just return an empty array
         if e.status_code == 400:
             return {"hotels": []}
         raise
-    return {"hotels": props}
+    return {"hotels": project_hotels(props, fields)}
+
+@app.get("/search-hotels/stream")
+async def search_hotels_stream_endpoint(
+    destination: str,
+    check_in: str,
+    check_out: str,
+    adults: int = 2,
+    currency: str = "USD",
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="ndjson or sse"),
+    fields: Optional[str] = Query(None, description='Comma-separated property keys to return, or "*" for the raw SerpAPI properties (default: a compact set)'),
+):
+    """
+    Same search as /search-hotels, streamed as pages of hotel properties
+    while the SerpAPI response is still arriving.
+    """
+    async def results():
+        try:
+            async for prop in services.stream_hotels(destination, check_in, check_out, adults, currency):
+                yield project_hotels([prop], fields)[0]
+        except HTTPException as e:
+            # as /search-hotels: a bad date or no hotels is just an empty result
+            if e.status_code != 400:
+                raise
+
+    return streaming_response(format, search_events(format, "hotels", results(), HOTELS_STREAM_PAGE_SIZE))
+
 # Flight Endpoints
 @app.post("/flights/", response_model=schemas.Flight)
-def create_flight(flight: schemas.FlightCreate, db: Session = Depends(get_db)):
-    return crud.create_flight(db=db, flight=flight)
+async def create_flight(flight: schemas.FlightCreate, db: AnySession = Depends(get_session)):
+    return await crud_async.create_flight(db, flight)
 
 
 @app.get("/flights/", response_model=list[schemas.Flight])
-def get_flights(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return crud.get_flights(db=db, skip=skip, limit=limit)
+async def get_flights(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header"),
+    db: AnySession = Depends(get_session),
+):
+    if fast("flights"):
+        rows = await crud_async.get_flights(db, skip, limit, cursor, FLIGHT.columns)
+        return _fast_list(rows_to_dicts(FLIGHT, rows), next_cursor(rows, limit, lambda f: (f.price, f.id)))
+    flights = await crud_async.get_flights(db, skip, limit, cursor)
+    _set_next_cursor(response, next_cursor(flights, limit, lambda f: (f.price, f.id)))
+    return flights
+
 
+@app.post("/flights/bulk")
+async def bulk_import_flights(request: Request, db: AnySession = Depends(get_session)):
+    """
+    Upsert many flights from a JSON array, NDJSON or CSV body, matched on
+    airline + flight_number + outbound_date. Invalid rows are reported, not fatal.
+    """
+    return await import_rows(
+        request, schemas.FlightCreate, ("airline", "flight_number", "outbound_date"),
+        lambda batch: crud_async.bulk_upsert_flights(db, batch),
+    )
 
 @app.put("/flights/{flight_id}", response_model=schemas.Flight)
-def update_flight(flight_id: int, flight_data: schemas.FlightUpdate, db: Session = Depends(get_db)):
-    updated_flight = crud.update_flight(db, flight_id, flight_data)
+async def update_flight(flight_id: int, flight_data: schemas.FlightUpdate, db: AnySession = Depends(get_session)):
+    updated_flight = await crud_async.update_flight(db, flight_id, flight_data)
     if not updated_flight:
         raise HTTPException(status_code=404, detail="Flight not found")
     return updated_flight
@@ -111,55 +276,368 @@ async def search_flights_endpoint(
     API endpoint to search for flights using SerpAPI.
     """
     try:
-        flights = search_flights(origin, destination, departure_date, return_date)
+        flights = await search_flights(origin, destination, departure_date, return_date)
         return {"flights": flights}
     except HTTPException as http_exc:
         raise http_exc  # Re-raise known exceptions
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error occurred: {str(e)}")
 
+@app.get("/search_flights/stream")
+async def search_flights_stream_endpoint(
+    origin: str = Query(..., description="Departure airport IATA code"),
+    destination: str = Query(..., description="Arrival airport IATA code"),
+    departure_date: str = Query(..., description="Departure date (YYYY-MM-DD)"),
+    return_date: str = Query(None, description="Return date (YYYY-MM-DD) - optional"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="ndjson or sse"),
+):
+    """
+    Same search as /search_flights/, streamed one flight per event (best
+    flights first, then other flights) while the SerpAPI response is still
+    arriving.
+    """
+    results = services.stream_flights(origin, destination, departure_date, return_date)
+    return streaming_response(format, search_events(format, "flight", results))
+
 
 
 
+@app.post("/search/batch")
+async def search_batch_endpoint(
+    batch: schemas.BatchSearchRequest,
+    stream: bool = Query(False, description="Stream each result as NDJSON as soon as it completes"),
+):
+    """
+    Run many flight/hotel/weather searches concurrently in one round trip.
+    """
+    results = services.search_batch(batch.searches)
+    if stream:
+        async def ndjson():
+            async for result in results:
+                yield json.dumps(result) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    combined = [result async for result in results]
+    combined.sort(key=lambda r: r["index"])
+    return {"results": combined}
+
+
+
+
+# Catalog query endpoints: filter and sort the flights/hotels tables server-side
+@app.get("/catalog/flights", response_model=list[schemas.Flight])
+async def query_flights(
+    response: Response,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    departure_from: Optional[date] = None,
+    departure_to: Optional[date] = None,
+    return_from: Optional[date] = None,
+    return_to: Optional[date] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    airline: Optional[list[str]] = Query(None, description="Repeat to match any of several airlines"),
+    max_duration: Optional[int] = Query(None, description="Minutes"),
+    sort: Literal[tuple(crud.FLIGHT_SORTS)] = "price",
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header"),
+    db: AnySession = Depends(get_session),
+):
+    filters = schemas.FlightQuery(
+        origin=origin, destination=destination,
+        departure_from=departure_from, departure_to=departure_to,
+        return_from=return_from, return_to=return_to,
+        min_price=min_price, max_price=max_price,
+        airlines=airline, max_duration=max_duration,
+    )
+    columns = crud.FLIGHT_SORTS[sort][0]
+    sort_key = lambda f: tuple(getattr(f, c.key) for c in columns)
+    if fast("catalog"):
+        rows = await crud_async.query_flights(db, filters, sort, limit, cursor, FLIGHT.columns)
+        return _fast_list(rows_to_dicts(FLIGHT, rows), next_cursor(rows, limit, sort_key))
+    flights = await crud_async.query_flights(db, filters, sort, limit, cursor)
+    _set_next_cursor(response, next_cursor(flights, limit, sort_key))
+    return flights
+
+
+@app.get("/catalog/hotels", response_model=list[schemas.Hotel])
+async def query_hotels(
+    response: Response,
+    location: Optional[str] = None,
+    check_in_from: Optional[date] = None,
+    check_in_to: Optional[date] = None,
+    check_out_from: Optional[date] = None,
+    check_out_to: Optional[date] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    min_rating: Optional[float] = None,
+    min_reviews: Optional[int] = None,
+    amenity: Optional[list[str]] = Query(None, description="Repeat to require several amenities"),
+    sort: Literal[tuple(crud.HOTEL_SORTS)] = "price",
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header"),
+    db: AnySession = Depends(get_session),
+):
+    filters = schemas.HotelQuery(
+        location=location,
+        check_in_from=check_in_from, check_in_to=check_in_to,
+        check_out_from=check_out_from, check_out_to=check_out_to,
+        min_price=min_price, max_price=max_price,
+        min_rating=min_rating, min_reviews=min_reviews,
+        amenities=amenity,
+    )
+    columns = crud.HOTEL_SORTS[sort][0]
+    sort_key = lambda h: tuple(getattr(h, c.key) for c in columns)
+    if fast("catalog"):
+        rows = await crud_async.query_hotels(db, filters, sort, limit, cursor, HOTEL.columns)
+        return _fast_list(rows_to_dicts(HOTEL, rows), next_cursor(rows, limit, sort_key))
+    hotels = await crud_async.query_hotels(db, filters, sort, limit, cursor)
+    _set_next_cursor(response, next_cursor(hotels, limit, sort_key))
+    return hotels
+
+
 # Booking endpoints
 @app.post("/bookings/flights/",response_model=schemas.Booking)
-def book_flight(
-    user_id: str   = Query(..., description="ID of the user"),
-    flight_id: int = Query(..., description="ID of an existing flight"),
-    db: Session    = Depends(get_db),
+async def book_flight(
+    response: Response,
+    user_id: Optional[str] = Query(None, description="ID of the user; defaults to the access token's user"),
+    flight_id: Optional[int] = Query(None, description="ID of an existing flight"),
+    offer_id: Optional[str] = Query(None, description="offer_id of a flight search result"),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    user: Optional[schemas.User] = Depends(auth.optional_user),
+    db: AnySession = Depends(get_session),
 ):
-    return services.book_flight(db, user_id, flight_id)
+    user_id = auth.user_id_for(user, user_id)
+    if idempotency_key is not None:
+        check_key(idempotency_key)
+    if offer_id:
+        flight_id = (await resolve_offer(db, models.Flight, offer_id)).id
+    elif flight_id is None:
+        raise HTTPException(422, detail="Provide flight_id or offer_id.")
+    booking = await crud_async.run(db, services.book_flight, user_id, flight_id, idempotency_key)
+    if isinstance(booking, dict):
+        response.headers[REPLAYED_HEADER] = "true"
+    return booking
 
 
 @app.post("/bookings/hotels/",response_model=schemas.Booking)
-def book_hotel(
-    user_id: str = Query(..., description="ID of the user"),
-    hotel_id: int  = Query(..., description="ID of an existing hotel"),
-    db: Session    = Depends(get_db),
+async def book_hotel(
+    response: Response,
+    user_id: Optional[str] = Query(None, description="ID of the user; defaults to the access token's user"),
+    hotel_id: Optional[int] = Query(None, description="ID of an existing hotel"),
+    offer_id: Optional[str] = Query(None, description="offer_id of a hotel search result"),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    user: Optional[schemas.User] = Depends(auth.optional_user),
+    db: AnySession = Depends(get_session),
+):
+    user_id = auth.user_id_for(user, user_id)
+    if idempotency_key is not None:
+        check_key(idempotency_key)
+    if offer_id:
+        hotel_id = (await resolve_offer(db, models.Hotel, offer_id)).id
+    elif hotel_id is None:
+        raise HTTPException(422, detail="Provide hotel_id or offer_id.")
+    booking = await crud_async.run(db, services.book_hotel, user_id, hotel_id, idempotency_key)
+    if isinstance(booking, dict):
+        response.headers[REPLAYED_HEADER] = "true"
+    return booking
+
+# A whole trip (e.g. flight + hotel) in one transaction: every item is booked or none is
+@app.post("/bookings/trip", response_model=list[schemas.Booking])
+async def book_trip(
+    trip: schemas.TripBookingRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    user: Optional[schemas.User] = Depends(auth.optional_user),
+    db: AnySession = Depends(get_session),
 ):
-    return services.book_hotel(db, user_id, hotel_id)
+    user_id = auth.user_id_for(user, trip.user_id)
+    if idempotency_key is not None:
+        check_key(idempotency_key)
+    items = []
+    for item in trip.items:
+        model = models.Flight if item.type == "flight" else models.Hotel
+        if item.offer_id:
+            item_id = (await resolve_offer(db, model, item.offer_id)).id
+        elif item.id is not None:
+            item_id = item.id
+        else:
+            raise HTTPException(422, detail="Each trip item needs an id or an offer_id.")
+        items.append((model, item_id))
+    bookings = await crud_async.run(db, services.book_trip, user_id, items, idempotency_key)
+    if bookings and isinstance(bookings[0], dict):
+        response.headers[REPLAYED_HEADER] = "true"
+    return bookings
+
+
+# With a token only the token's user's bookings can be cancelled; without
+# one (AUTH_REQUIRED=false) any booking can, as before
+@app.post("/bookings/cancel")
+async def cancel_bookings(
+    request: schemas.CancelBookingsRequest,
+    user: Optional[schemas.User] = Depends(auth.optional_user),
+    db: AnySession = Depends(get_session),
+):
+    result = await crud_async.run(db, services.cancel_bookings, request.booking_ids, auth.owner_id(user))
+    return result
 
 @app.delete("/bookings/flights/{booking_id}")
-def delete_flight_booking(booking_id: int, db: Session = Depends(get_db)):
-    return crud.delete_flight_booking(db, booking_id)
+async def delete_flight_booking(
+    booking_id: int,
+    user: Optional[schemas.User] = Depends(auth.optional_user),
+    db: AnySession = Depends(get_session),
+):
+    result = await crud_async.delete_flight_booking(db, booking_id, auth.owner_id(user))
+    return result
 
 @app.delete("/bookings/hotels/{booking_id}")
-def delete_hotel_booking(booking_id: int, db: Session = Depends(get_db)):
-    return crud.delete_hotel_booking(db, booking_id)
+async def delete_hotel_booking(
+    booking_id: int,
+    user: Optional[schemas.User] = Depends(auth.optional_user),
+    db: AnySession = Depends(get_session),
+):
+    result = await crud_async.delete_hotel_booking(db, booking_id, auth.owner_id(user))
+    return result
 
 @app.get("/bookings/{user_id}", response_model=list[schemas.Booking])
-def get_user_bookings(
+async def get_user_bookings(
     user_id: str,
     skip: int = 0,
-    limit: int = 10,
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header"),
+    if_none_match: Optional[str] = Header(None),
+    user: Optional[schemas.User] = Depends(auth.optional_user),
+    db: AnySession = Depends(get_session)
 ): 
-    return crud.get_bookings(db, user_id, skip, limit)
+    auth.user_id_for(user, user_id)
+    # served from the bookings cache when possible; an unchanged list is a
+    # 304 for a client that sends back the ETag, after one primary-key lookup
+    version = await crud_async.get_bookings_version(db, user_id)
+    key = bookings_cache.page_key(user_id, version, skip, limit, cursor)
+    page = await bookings_cache.get_page(key)
+    if page is None:
+        if fast("bookings"):
+            bookings = await crud_async.get_booking_rows(db, user_id, skip, limit, cursor)
+            body = to_jsonable(booking_rows_to_dicts(bookings))
+        else:
+            bookings = await crud_async.get_bookings(db, user_id, skip, limit, cursor)
+            body = jsonable_encoder([schemas.Booking.model_validate(b, from_attributes=True) for b in bookings])
+        page = {
+            "body": body,
+            "etag": bookings_cache.etag(body),
+            "next_cursor": next_cursor(bookings, limit, lambda b: (b.booking_date, b.id)),
+        }
+        await bookings_cache.set_page(key, page)
+
+    headers = {"ETag": page["etag"], "Cache-Control": "private, no-cache"}
+    if page["next_cursor"]:
+        headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    if bookings_cache.etag_matches(if_none_match, page["etag"]):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(page["body"], headers=headers)
 
 
 # Weather Endpoint
 @app.get("/weather/")
-def get_weather_endpoint(city_name: str):
-    return services.get_weather(city_name)
+async def get_weather_endpoint(
+    city_name: str = Query(..., description="City name or IATA airport code"),
+    daily: bool = Query(False, description="One min/max/precipitation summary per day instead of 3-hourly entries"),
+):
+    return await services.get_weather(city_name, daily)
+
+
+@app.get("/weather/multi")
+async def get_weather_multi_endpoint(
+    city: list[str] = Query(..., description="City name or IATA code; repeat for each stop of an itinerary"),
+    daily: bool = Query(False, description="One summary per day instead of 3-hourly entries"),
+):
+    """
+    Forecasts for several cities in one request; each city succeeds or
+    fails on its own.
+    """
+    return {"results": await services.get_weather_many(city, daily)}
+
+
+# Search cache hit/miss and request-coalescing counters
+@app.get("/cache/stats")
+def get_cache_stats():
+    return {
+        "cache": get_cache().stats(),
+        "singleflight": search_singleflight.stats(),
+        "hot_set": hot_searches.stats(),
+        "catalog": catalog_writer.stats(),
+        "bookings": bookings_cache.get_bookings_cache().stats(),
+        "city_index": city_index.stats(),
+        "auth_users": auth.user_cache.stats(),
+    }
+
+
+# Circuit breaker state, retries and hedges per upstream
+@app.get("/upstreams/stats")
+def get_upstream_stats():
+    return {name: upstream.stats() for name, upstream in upstreams.items()}
+
+
+# Connection pool usage: checked out, overflow, checkout wait histogram
+@app.get("/db/pool")
+def get_pool_stats():
+    return pool_stats()
+
+
+# Prometheus metrics: request/upstream/query/bcrypt latency histograms plus
+# the counters behind the /cache, /upstreams and /db stats endpoints
+CACHE_COUNTERS = ("hits", "stale_hits", "misses", "evictions", "errors")
+stats_collector("search_cache", lambda: get_cache().stats(), CACHE_COUNTERS)
+stats_collector("bookings_cache", lambda: bookings_cache.get_bookings_cache().stats(), CACHE_COUNTERS)
+stats_collector("singleflight", search_singleflight.stats, ("calls", "executed", "collapsed"))
+stats_collector("catalog", catalog_writer.stats, ("queued", "inserted", "flushes", "failures", "dropped"))
+stats_collector(
+    "upstream", lambda: {name: upstream.stats() for name, upstream in upstreams.items()},
+    ("calls", "failures", "retries", "hedges", "rejected"), label="upstream",
+)
+stats_collector("password_hash", security.stats, ("rejected",))
+stats_collector("auth_user_cache", auth.user_cache.stats, ("hits", "misses"))
+
+
+def _pool_metrics():
+    # the checkout wait buckets stay on /db/pool; mean wait = wait seconds / checkouts
+    stats = {}
+    for engine_name, snapshot in pool_stats().items():
+        wait = snapshot.pop("wait_seconds")
+        stats[engine_name] = {**snapshot, "checkouts": wait["count"], "checkout_wait_seconds": wait["sum"]}
+    return stats
+
+
+stats_collector("db_pool", _pool_metrics, ("timeouts", "checkouts", "checkout_wait_seconds"), label="engine")
+
+
+@metrics.collector
+def breaker_metrics():
+    states = {"closed": 0, "half_open": 1, "open": 2}
+    yield (
+        "upstream_breaker_state", "gauge", "Circuit breaker: 0 closed, 1 half open, 2 open.", ("upstream",),
+        [((name,), states[upstream.breaker.state]) for name, upstream in upstreams.items()],
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# Profiles of recent requests run with SQL_PROFILING (see app/profiler.py)
+@app.get("/debug/sql-profiles", include_in_schema=False)
+def list_sql_profiles():
+    if not SQL_PROFILING:
+        raise HTTPException(404, detail="SQL profiling is off (SQL_PROFILING=true to enable).")
+    return [profile.summary() for profile in reversed(recent_profiles)]
+
+
+@app.get("/debug/sql-profiles/{profile_id}", include_in_schema=False)
+def get_sql_profile(profile_id: str):
+    profile = get_profile(profile_id) if SQL_PROFILING else None
+    if profile is None:
+        raise HTTPException(404, detail="Profile not found")
+    return profile.details()
 
 
@@ -0,0 +1,14 @@
+# tests/conftest.py
+#
+# Run from backend/:  python -m pytest -q
+# The app modules read their settings at import time, so point them at a
+# throwaway SQLite database (and a signing secret, which auth requires)
+# before anything imports them.
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.sqlite3')}")
+os.environ.setdefault("AUTH_SECRET", "test-signing-secret-" + os.urandom(16).hex())
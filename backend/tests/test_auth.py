@@ -0,0 +1,23 @@
+# tests/test_auth.py
+
+import pytest
+from app import auth
+
+
+@pytest.mark.parametrize("value", ["change-me", "CHANGEME", "a-real-key,secret"])
+def test_placeholder_secret_is_refused_when_auth_is_required(value):
+    with pytest.raises(RuntimeError):
+        auth.load_secrets(value, required=True)
+
+
+@pytest.mark.parametrize("value", ["", " , "])
+def test_missing_secret_is_refused_when_auth_is_required(value):
+    with pytest.raises(RuntimeError):
+        auth.load_secrets(value, required=True)
+
+
+def test_secrets_rotate_and_fallbacks_only_without_auth():
+    assert auth.load_secrets("new-key, old-key", required=True) == [b"new-key", b"old-key"]
+    assert auth.load_secrets("change-me", required=False) == [b"change-me"]
+    # a per-process random key, only when tokens aren't required
+    assert len(auth.load_secrets("", required=False)[0]) == 32
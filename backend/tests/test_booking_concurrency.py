@@ -0,0 +1,94 @@
+# tests/test_booking_concurrency.py
+#
+# The in-process counterpart of bench/booking_stress.py: concurrent
+# bookings through the real endpoints (requests from threads, crud work in
+# the threadpool) against a temp SQLite database.
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+from app import auth, database, migrations
+from app.models import Booking, Flight, Hotel, User
+import main
+
+UNITS = 5
+ATTEMPTS = 20
+
+
+@pytest.fixture(scope="module")
+def client():
+    migrations.upgrade(database.engine)
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def user_headers():
+    db = database.SessionLocal()
+    try:
+        user = User(id=uuid.uuid4().hex, username=uuid.uuid4().hex, email=f"{uuid.uuid4().hex}@example.com", is_active=True)
+        db.add(user)
+        db.commit()
+        return {"Authorization": f"Bearer {auth.issue_tokens(user)['access_token']}"}
+    finally:
+        db.close()
+
+
+def create_item(client, kind: str, units: int) -> int:
+    if kind == "hotel":
+        body = {"name": "Stress Hotel", "location": f"Stress {uuid.uuid4().hex[:8]}", "price": 100,
+                "available_rooms": units, "check_in_date": "2030-06-01", "check_out_date": "2030-06-03"}
+    else:
+        body = {"departure_id": "TLV", "arrival_id": "ATH", "outbound_date": "2030-06-01",
+                "return_date": "2030-06-05", "price": 150, "available_seats": units}
+    response = client.post(f"/{kind}s/", json=body)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def inventory(kind: str, item_id: int) -> tuple[int, int]:
+    """
+    (units left, bookings made) for the item, read from the database.
+    """
+    model, column = (Hotel, "available_rooms") if kind == "hotel" else (Flight, "available_seats")
+    db = database.SessionLocal()
+    try:
+        left = getattr(db.get(model, item_id), column)
+        booked = db.query(Booking).filter(getattr(Booking, f"{kind}_id") == item_id).count()
+        return left, booked
+    finally:
+        db.close()
+
+
+def book_all(client, kind: str, item_id: int, headers_list: list[dict]):
+    def book(headers):
+        return client.post(f"/bookings/{kind}s/", params={f"{kind}_id": item_id}, headers=headers)
+
+    with ThreadPoolExecutor(max_workers=len(headers_list)) as pool:
+        return list(pool.map(book, headers_list))
+
+
+@pytest.mark.parametrize("kind", ["hotel", "flight"])
+def test_concurrent_bookings_never_oversell(client, user_headers, kind):
+    item_id = create_item(client, kind, UNITS)
+    responses = book_all(client, kind, item_id, [
+        {**user_headers, "Idempotency-Key": uuid.uuid4().hex} for _ in range(ATTEMPTS)
+    ])
+
+    statuses = sorted(r.status_code for r in responses)
+    assert statuses.count(200) == UNITS
+    assert all(status == 409 for status in statuses if status != 200), statuses
+    assert inventory(kind, item_id) == (0, UNITS)
+
+
+def test_repeated_idempotency_key_books_once(client, user_headers):
+    item_id = create_item(client, "hotel", UNITS)
+    headers = {**user_headers, "Idempotency-Key": uuid.uuid4().hex}
+    responses = book_all(client, "hotel", item_id, [headers] * 8)
+    responses.append(client.post("/bookings/hotels/", params={"hotel_id": item_id}, headers=headers))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in responses) == len(responses) - 1
+    assert inventory("hotel", item_id) == (UNITS - 1, 1)
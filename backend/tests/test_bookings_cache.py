@@ -0,0 +1,48 @@
+# tests/test_bookings_cache.py
+
+import uuid
+from datetime import date
+from fastapi.testclient import TestClient
+from app import auth, crud, database, migrations
+from app.models import User, Hotel
+from app.schemas import BookingCreate
+import main
+
+
+def seed_user_and_hotel():
+    migrations.upgrade(database.engine)
+    db = database.SessionLocal()
+    try:
+        user = User(id=uuid.uuid4().hex, username=uuid.uuid4().hex, email=f"{uuid.uuid4().hex}@example.com", is_active=True)
+        hotel = Hotel(name="Cache Inn", location="Haifa", price=90, available_rooms=5,
+                      check_in_date=date(2030, 8, 1), check_out_date=date(2030, 8, 3))
+        db.add_all([user, hotel])
+        db.commit()
+        return user.id, hotel.id, auth.issue_tokens(user)["access_token"]
+    finally:
+        db.close()
+
+
+def book_elsewhere(user_id: str, hotel_id: int):
+    # a write made by another worker: straight to the database, not through this process's cache
+    db = database.SessionLocal()
+    try:
+        return crud.create_booking(db, BookingCreate(user_id=user_id, hotel_id=hotel_id)).id
+    finally:
+        db.close()
+
+
+def test_booking_on_another_worker_invalidates_cached_pages():
+    user_id, hotel_id, token = seed_user_and_hotel()
+    headers = {"Authorization": f"Bearer {token}"}
+    with TestClient(main.app) as client:
+        first = client.get(f"/bookings/{user_id}", headers=headers)
+        assert first.status_code == 200 and first.json() == []
+        assert client.get(f"/bookings/{user_id}", headers={**headers, "If-None-Match": first.headers["ETag"]}).status_code == 304
+
+        booking_id = book_elsewhere(user_id, hotel_id)
+
+        after = client.get(f"/bookings/{user_id}", headers={**headers, "If-None-Match": first.headers["ETag"]})
+        assert after.status_code == 200
+        assert [b["id"] for b in after.json()] == [booking_id]
+        assert after.headers["ETag"] != first.headers["ETag"]
@@ -0,0 +1,71 @@
+# tests/test_catalog.py
+
+import asyncio
+from app import catalog, crud_async, database, migrations
+from app.models import Flight
+
+
+def test_offer_booked_during_slow_flush(monkeypatch):
+    migrations.upgrade(database.engine)
+    writer = catalog.CatalogWriter()
+    monkeypatch.setattr(catalog, "catalog_writer", writer)
+    # an offer left queued (say its first write failed) that a retry is writing
+    offer = catalog.flight_row(
+        {"price": 420, "airline": "El Al", "flight_number": "LY 1", "departure_time": "10:00", "arrival_time": "15:00"},
+        "TLV", "JFK", "2030-03-01", "2030-03-08",
+    )
+    writer.add(Flight, [offer])
+    flight = {"offer_id": offer["offer_hash"]}
+
+    write_started, finish_write = asyncio.Event(), asyncio.Event()
+    run_in_new_session = crud_async.run_in_new_session
+
+    async def slow_write(fn, *args):
+        write_started.set()
+        await finish_write.wait()
+        return await run_in_new_session(fn, *args)
+
+    monkeypatch.setattr(crud_async, "run_in_new_session", slow_write)
+
+    async def book_during_flush():
+        flush = asyncio.ensure_future(writer.flush())
+        await write_started.wait()
+        # the offer is out of the queue but not committed yet
+        assert writer.is_pending(Flight, flight["offer_id"])
+        db = database.SessionLocal()
+        try:
+            resolve = asyncio.ensure_future(catalog.resolve_offer(db, Flight, flight["offer_id"]))
+            await asyncio.sleep(0.05)
+            assert not resolve.done()  # waiting for the write, not a 404
+            finish_write.set()
+            row = await resolve
+        finally:
+            db.close()
+        await flush
+        return row
+
+    row = asyncio.run(book_during_flush())
+    assert row.offer_hash == flight["offer_id"] and row.price == 420
+    assert not writer.is_pending(Flight, flight["offer_id"])
+
+
+def test_offer_is_bookable_on_another_worker(monkeypatch):
+    migrations.upgrade(database.engine)
+    worker_a, worker_b = catalog.CatalogWriter(), catalog.CatalogWriter()
+
+    async def search_on_a_book_on_b():
+        monkeypatch.setattr(catalog, "catalog_writer", worker_a)
+        [flight] = await catalog.ingest_flights(
+            [{"price": 510, "airline": "El Al", "flight_number": "LY 7", "departure_time": "08:00", "arrival_time": "13:00"}],
+            "TLV", "CDG", "2030-05-01", "2030-05-08",
+        )
+        # worker B has never seen the offer and worker A's loop never ran
+        monkeypatch.setattr(catalog, "catalog_writer", worker_b)
+        db = database.SessionLocal()
+        try:
+            return flight, await catalog.resolve_offer(db, Flight, flight["offer_id"])
+        finally:
+            db.close()
+
+    flight, row = asyncio.run(search_on_a_book_on_b())
+    assert row.offer_hash == flight["offer_id"] and row.price == 510
@@ -0,0 +1,105 @@
+# tests/test_google_auth.py
+
+import time
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi import HTTPException
+
+jwt = pytest.importorskip("jwt")
+rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+
+from app import database, google_auth, migrations
+from app.models import User
+import main
+
+CLIENT_ID = "client-123.apps.googleusercontent.com"
+
+# throwaway keys standing in for Google's, and one Google never published
+GOOGLE_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+OTHER_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def id_token(key=GOOGLE_KEY, kid: str = "k1", **overrides) -> str:
+    claims = {
+        "iss": "https://accounts.google.com", "aud": CLIENT_ID, "sub": uuid.uuid4().hex,
+        "email": f"{uuid.uuid4().hex}@example.com", "email_verified": True, "name": "Test User",
+        "iat": int(time.time()), "exp": int(time.time()) + 3600, **overrides,
+    }
+    return jwt.encode(claims, key, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture(autouse=True)
+def google(monkeypatch):
+    """
+    Google's key set served from memory; returns the list of fetch times.
+    """
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(GOOGLE_KEY.public_key(), as_dict=True)
+    fetches = []
+
+    def fetch_data():
+        fetches.append(time.monotonic())
+        time.sleep(0.05)  # a slow fetch, so concurrent verifications overlap it
+        return {"keys": [{**jwk, "kid": "k1", "alg": "RS256", "use": "sig"}]}
+
+    keys = jwt.PyJWKClient("https://certs.test", lifespan=3600, cooldown_duration=60)
+    monkeypatch.setattr(keys, "fetch_data", fetch_data)
+    monkeypatch.setattr(google_auth, "google_keys", keys)
+    monkeypatch.setattr(google_auth, "GOOGLE_CLIENT_ID", CLIENT_ID)
+    migrations.upgrade(database.engine)
+    return fetches
+
+
+def sign_in(credential: str):
+    db = database.SessionLocal()
+    try:
+        return asyncio.run(main.create_google_user(main.schemas.GoogleCredential(credential=credential), db))
+    finally:
+        db.close()
+
+
+def test_valid_credential_signs_in_the_token_subject():
+    token = id_token(sub="google-sub-1")
+    body = sign_in(token)
+    assert body["id"] == "google-sub-1" and body["access_token"]
+    # signing in again is the same account
+    assert sign_in(id_token(sub="google-sub-1"))["id"] == "google-sub-1"
+
+
+@pytest.mark.parametrize("credential", [
+    id_token(key=OTHER_KEY),  # forged signature
+    id_token(key=OTHER_KEY, kid="unknown"),
+    id_token(aud="someone-else.apps.googleusercontent.com"),
+    id_token(iss="https://evil.example.com"),
+    id_token(exp=int(time.time()) - 3600),
+    "not-a-jwt",
+    "WzFd.e30.AA",  # header is the JSON array [1]
+    "e30.WzFd.AA",  # payload is the JSON array [1]
+    "e30.e30.AA",  # header {} (no kid)
+])
+def test_bad_credential_is_rejected(credential):
+    with pytest.raises(HTTPException) as exc:
+        sign_in(credential)
+    assert exc.value.status_code == 401
+
+
+def test_password_account_is_never_signed_in_through_google():
+    db = database.SessionLocal()
+    try:
+        db.add(User(id="victim-id", username="victim", email="victim@example.com", hashed_password="x", is_active=True))
+        db.commit()
+    finally:
+        db.close()
+    for token in (id_token(sub="victim-id"), id_token(email="victim@example.com")):
+        with pytest.raises(HTTPException) as exc:
+            sign_in(token)
+        assert exc.value.status_code == 409
+
+
+def test_concurrent_sign_ins_fetch_the_keys_once(google):
+    tokens = [id_token() for _ in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        claims = list(pool.map(lambda token: asyncio.run(google_auth.verify_id_token(token)), tokens))
+    assert [c["sub"] for c in claims] == [jwt.decode(t, options={"verify_signature": False})["sub"] for t in tokens]
+    assert len(google) == 1
@@ -0,0 +1,78 @@
+# tests/test_migrations.py
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, Boolean, Date, Float, JSON, ForeignKey
+from sqlalchemy import create_engine, inspect
+from app import migrations, models
+
+# The tables as the first release created them, before any migration
+baseline = MetaData()
+Table(
+    "users", baseline,
+    Column("id", String(128), primary_key=True, index=True),
+    Column("username", String, unique=True, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("hashed_password", String, nullable=True),
+    Column("is_active", Boolean, default=True),
+)
+Table(
+    "hotels", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, index=True),
+    Column("location", String),
+    Column("price", Integer),
+    Column("available_rooms", Integer),
+    Column("link", String),
+    Column("overall_rating", Float),
+    Column("reviews", Integer),
+    Column("check_in_date", Date),
+    Column("check_out_date", Date),
+    Column("amenities", JSON, nullable=True),
+    Column("images", JSON, nullable=True),
+)
+Table(
+    "flights", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("departure_id", String),
+    Column("arrival_id", String),
+    Column("outbound_date", Date),
+    Column("return_date", Date),
+    Column("airline", String),
+    Column("flight_number", String),
+    Column("departure_time", String),
+    Column("arrival_time", String),
+    Column("total_duration", Integer),
+    Column("price", Float),
+    Column("google_flights_url", String),
+)
+Table(
+    "bookings", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", String(128), ForeignKey("users.id"), nullable=False),
+    Column("flight_id", Integer, ForeignKey("flights.id"), nullable=True),
+    Column("hotel_id", Integer, ForeignKey("hotels.id"), nullable=True),
+    Column("booking_date", Date),
+)
+
+
+def assert_matches_models(engine):
+    inspector = inspect(engine)
+    for table in models.Base.metadata.sorted_tables:
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        assert columns == {c.name for c in table.columns}, table.name
+        indexes = {i["name"]: (tuple(i["column_names"]), bool(i["unique"])) for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            assert indexes.get(index.name) == (tuple(c.name for c in index.columns), bool(index.unique)), index.name
+
+
+def test_upgrade_from_baseline_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.sqlite3'}")
+    baseline.create_all(engine)
+    migrations.upgrade(engine)
+    assert_matches_models(engine)
+    migrations.upgrade(engine)  # nothing left to do
+
+
+def test_upgrade_fresh_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.sqlite3'}")
+    migrations.upgrade(engine)
+    assert_matches_models(engine)
@@ -0,0 +1,30 @@
+# tests/test_pagination.py
+
+import pytest
+from fastapi.testclient import TestClient
+from app.pagination import encode_cursor
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("cursor", [
+    "MQ",  # 1
+    encode_cursor(({"a": 1}, 2)),
+    encode_cursor((1,)),
+    encode_cursor((True, 2)),
+    "%%%",
+])
+@pytest.mark.parametrize("path", ["/hotels/", "/flights/", "/catalog/hotels", "/catalog/flights"])
+def test_malformed_cursor_is_a_400(client, path, cursor):
+    response = client.get(path, params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor."}
+
+
+def test_well_formed_cursor_is_accepted(client):
+    assert client.get("/hotels/", params={"cursor": encode_cursor((100.0, 5))}).status_code == 200
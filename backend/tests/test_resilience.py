@@ -0,0 +1,52 @@
+# tests/test_resilience.py
+
+import asyncio
+import httpx
+import pytest
+from app.resilience import Upstream
+
+
+def half_open_upstream(send) -> Upstream:
+    upstream = Upstream("test", 1)
+    upstream.breaker.state = "open"
+    upstream.breaker.opened_at = -upstream.breaker.open_seconds  # open window already over
+    upstream._send = send
+    return upstream
+
+
+def test_probe_with_unrelated_error_releases_breaker():
+    async def send(url, params):
+        raise httpx.DecodingError("bad gzip")
+
+    upstream = half_open_upstream(send)
+    with pytest.raises(httpx.DecodingError):
+        asyncio.run(upstream.get("http://upstream", {}))
+    assert upstream.breaker.state == "half_open"
+    # the next call gets to probe instead of being rejected forever
+    assert upstream.breaker.allow()
+
+
+def test_cancelled_probe_releases_breaker():
+    async def send(url, params):
+        await asyncio.sleep(60)
+
+    upstream = half_open_upstream(send)
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(upstream.get("http://upstream", {}))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    assert upstream.breaker.allow()
+
+
+def test_successful_probe_closes_breaker():
+    async def send(url, params):
+        return httpx.Response(200)
+
+    upstream = half_open_upstream(send)
+    assert asyncio.run(upstream.get("http://upstream", {})).status_code == 200
+    assert upstream.breaker.state == "closed"
@@ -0,0 +1,15 @@
+# tests/test_security.py
+
+import uuid
+from fastapi.testclient import TestClient
+import main
+
+
+def test_password_hashing_survives_a_second_lifespan():
+    name = f"user-{uuid.uuid4().hex[:8]}"
+    with TestClient(main.app) as client:
+        assert client.post("/users/", json={"username": name, "email": f"{name}@example.com", "password": "pw-123456"}).status_code == 200
+    # the first lifespan's shutdown must not leave the bcrypt pool dead
+    with TestClient(main.app) as client:
+        response = client.post("/login/", data={"username": name, "password": "pw-123456"})
+        assert response.status_code == 200 and response.json()["access_token"]
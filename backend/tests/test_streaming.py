@@ -0,0 +1,135 @@
+# tests/test_streaming.py
+
+import json
+import asyncio
+import httpx
+import pytest
+from app import services, http_client
+from app.streaming import JSONItemStream, search_events
+
+
+def flight_option(price: int) -> dict:
+    return {"price": price, "total_duration": 300, "flights": [{
+        "airline": "El Al", "flight_number": f"LY {price}",
+        "departure_airport": {"time": "2030-01-01 10:00"}, "arrival_airport": {"time": "2030-01-01 15:00"},
+    }]}
+
+
+def test_item_stream_survives_any_chunking():
+    doc = {
+        "search_metadata": {"status": "Success", "google_flights_url": 'u"]}'},
+        "best_flights": [flight_option(i) for i in range(3)],
+        "note": "other_flights",
+        "other_flights": [{**flight_option(10 + i), "tricky": '\\\\"[{'} for i in range(20)],
+    }
+    data = json.dumps(doc).encode()
+    for size in (1, 2, 7, 64, len(data)):
+        parser = JSONItemStream(arrays=("best_flights", "other_flights"), objects=("search_metadata",))
+        items = []
+        for start in range(0, len(data), size):
+            items += parser.feed(data[start:start + size])
+        assert items == [("search_metadata", doc["search_metadata"])] + \
+            [("best_flights", f) for f in doc["best_flights"]] + [("other_flights", f) for f in doc["other_flights"]]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """
+    Fake SerpAPI whose body stops after the first flight until `release` is set.
+    """
+    release = asyncio.Event()
+    body = json.dumps({
+        "search_metadata": {"status": "Success", "google_flights_url": "https://flights"},
+        "best_flights": [flight_option(100)],
+        "other_flights": [flight_option(200), flight_option(300)],
+    }).encode()
+    split = body.index(b'"other_flights"')
+
+    async def chunks():
+        yield body[:split]
+        await release.wait()
+        yield body[split:]
+
+    def handler(request):
+        return httpx.Response(200, content=chunks())
+
+    monkeypatch.setattr(services, "SERPAPI_API_KEY", "test")
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return release
+
+
+def test_flights_stream_before_upstream_body_is_complete(upstream):
+    async def consume():
+        results = services.stream_flights("TLV", "JFK", "2030-01-01", "2030-01-08")
+        first = await asyncio.wait_for(results.__anext__(), 5)
+        # the rest of the body hasn't been sent yet
+        upstream.set()
+        rest = [flight async for flight in results]
+        return first, rest
+
+    first, rest = asyncio.run(consume())
+    assert first["price"] == 100 and first["offer_id"] and first["google_flights_url"] == "https://flights"
+    assert [f["price"] for f in rest] == [200, 300]
+
+
+def hotel_property(name: str) -> dict:
+    return {"name": name, "rate_per_night": {"extracted_lowest": 100}, "gps_coordinates": {"latitude": 1, "longitude": 2}}
+
+
+def test_hotels_stream_before_upstream_body_is_complete(monkeypatch):
+    release = asyncio.Event()
+    body = json.dumps({
+        "search_metadata": {"status": "Success"},
+        "properties": [hotel_property("First"), hotel_property("Second"), hotel_property("Third")],
+    }).encode()
+    split = body.index(b'{"name": "Second"')
+
+    async def chunks():
+        yield body[:split]
+        await release.wait()
+        yield body[split:]
+
+    monkeypatch.setattr(services, "SERPAPI_API_KEY", "test")
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=chunks())),
+    ))
+
+    async def consume():
+        results = services.stream_hotels("Tel Aviv Stream", "2030-02-01", "2030-02-03")
+        first = await asyncio.wait_for(results.__anext__(), 5)
+        release.set()
+        rest = [prop async for prop in results]
+        return first, rest
+
+    first, rest = asyncio.run(consume())
+    assert first["name"] == "First" and first["offer_id"]
+    assert [p["name"] for p in rest] == ["Second", "Third"]
+
+
+@pytest.mark.parametrize("failure", [httpx.ReadTimeout("read timed out"), b"{not json]"])
+def test_failure_after_first_item_ends_stream_with_error_event(monkeypatch, failure):
+    body = json.dumps({
+        "search_metadata": {"status": "Success", "google_flights_url": "https://flights"},
+        "best_flights": [flight_option(100)],
+        "other_flights": [flight_option(200)],
+    }).encode()
+    split = body.index(b'"other_flights"')
+
+    async def chunks():
+        yield body[:split]
+        if isinstance(failure, Exception):
+            raise failure
+        yield b'"other_flights": [' + failure
+
+    monkeypatch.setattr(services, "SERPAPI_API_KEY", "test")
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=chunks())),
+    ))
+
+    async def consume():
+        results = services.stream_flights("TLV", "LHR", "2030-04-01", "2030-04-08")
+        return [json.loads(line) async for line in search_events("ndjson", "flight", results)]
+
+    events = asyncio.run(consume())
+    assert [e["event"] for e in events] == ["start", "flight", "error"]
+    assert events[-1]["data"]["status_code"] == 502
@@ -4,6 +4,7 @@ import LoginRegisterPage from './pages/LoginRegisterPage';
 import SearchPage from './pages/SearchPage';
 import BookingsPage from './pages/BookingsPage';
 import GoogleAuth from './pages/GoogleAuth';
+import { clearTokens } from './utils/api';
 
 function App() {
   const [user, setUser] = useState(null);
@@ -17,6 +18,7 @@ function App() {
 
   const handleLogout = () => {
     localStorage.removeItem('user');
+    clearTokens();
     setUser(null);
   };
 
@@ -13,19 +13,13 @@ const GoogleAuth = ({ clientId, setUser }) => {
     console.log('Google login successful:', decoded);
     
     try {
-      // Create user in backend
-      const userData = {
-        id: decoded.sub,
-        email: decoded.email,
-        name: decoded.name
-      };
-      
-      console.log('Creating user in backend:', userData);
-      const createdUser = await createGoogleUser(userData);
+      // The backend verifies the credential and takes the user from it
+      console.log('Creating user in backend:', decoded.sub);
+      const createdUser = await createGoogleUser(credential);
       console.log('User created successfully:', createdUser);
       
       const userObj = {
-        id: decoded.sub,
+        id: createdUser.id,
         email: decoded.email,
         name: decoded.name,
         picture: decoded.picture,
@@ -17,14 +17,14 @@ const LoginRegisterPage = ({ setUser }) => {
     try {
       let userData;
       if (isRegistering) {
-        userData = await registerUser({
+        await registerUser({
           username: email,
           email,
           password,
         });
-      } else {
-        userData = await loginUser({ email, password });
       }
+      // logging in also stores the access/refresh tokens
+      userData = await loginUser({ email, password });
 
       const userObj = {
         id: userData.user_id || userData.id,
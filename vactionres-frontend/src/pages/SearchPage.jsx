@@ -8,6 +8,9 @@ import {
   getWeather,
   bookFlight,
   bookHotel,
+  bookFlightOffer,
+  bookHotelOffer,
+  bookTrip,
   createFlight,
   createHotel,
 } from "../utils/api";
@@ -75,7 +78,19 @@ const SearchPage = ({ user, onLogout }) => {
   try {
     let dbFlight;
 
-   if (flight) {
+   if (flight?.offer_id && hotel?.offer_id) {
+      // flight + hotel together in one transaction
+      await bookTrip(String(user.id), [
+        { type: "flight", offer_id: flight.offer_id },
+        { type: "hotel", offer_id: hotel.offer_id },
+      ]);
+      navigate("/bookings");
+      return;
+    }
+
+   if (flight?.offer_id) {
+      dbFlight = (await bookFlightOffer(String(user.id), flight.offer_id)).flight;
+    } else if (flight) {
       const flightPayload = {
         departure_id: origin,
         arrival_id: destination,
@@ -98,6 +113,11 @@ const SearchPage = ({ user, onLogout }) => {
         alert("You must book a flight before booking a hotel.");
         return;
       }
+      if (hotel.offer_id) {
+        await bookHotelOffer(String(user.id), hotel.offer_id);
+        navigate("/bookings");
+        return;
+      }
       const hotelPayload = {
           name: hotel.name,
           location: hotel.location || "",
@@ -3,6 +3,49 @@ const BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8800';
 
 // — Auth —
 
+// Access/refresh tokens from /login/ or /users/google/; booking calls send
+// the access token and trade the refresh token for a new pair on a 401.
+const TOKENS_KEY = 'auth';
+
+const saveTokens = (data) => {
+  localStorage.setItem(TOKENS_KEY, JSON.stringify({
+    access_token: data.access_token,
+    refresh_token: data.refresh_token,
+  }));
+};
+
+export const clearTokens = () => localStorage.removeItem(TOKENS_KEY);
+
+const getTokens = () => JSON.parse(localStorage.getItem(TOKENS_KEY) || 'null');
+
+const refreshTokens = async () => {
+  const tokens = getTokens();
+  if (!tokens?.refresh_token) return false;
+  const res = await fetch(`${BASE_URL}/token/refresh`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ refresh_token: tokens.refresh_token }),
+  });
+  if (!res.ok) {
+    clearTokens();
+    return false;
+  }
+  saveTokens(await res.json());
+  return true;
+};
+
+const authFetch = async (url, options = {}) => {
+  const send = () => {
+    const tokens = getTokens();
+    const headers = { ...options.headers };
+    if (tokens?.access_token) headers.Authorization = `Bearer ${tokens.access_token}`;
+    return fetch(url, { ...options, headers });
+  };
+  const res = await send();
+  if (res.status === 401 && await refreshTokens()) return send();
+  return res;
+};
+
 export const registerUser = async (userData) => {
   const res = await fetch(`${BASE_URL}/users/`, {
     method: 'POST',
@@ -30,27 +73,31 @@ export const loginUser = async (credentials) => {
     const err = await res.text();
     throw new Error(`Login failed: ${err}`);
   }
-  return await res.json();
+  const data = await res.json();
+  saveTokens(data);
+  return data;
 };
 
-export const createGoogleUser = async (userData) => {
+export const createGoogleUser = async (credential) => {
   const res = await fetch(`${BASE_URL}/users/google/`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify(userData),
+    body: JSON.stringify({ credential }),
   });
   if (!res.ok) {
     const err = await res.text();
     throw new Error(`Google user creation failed: ${err}`);
   }
-  return await res.json();
+  const data = await res.json();
+  saveTokens(data);
+  return data;
 };
 
 // — Bookings —
 
 // This is the one that BookingsPage.jsx imports:
 export const fetchBookings = async (userId) => {
-  const res = await fetch(`${BASE_URL}/bookings/${userId}`);
+  const res = await authFetch(`${BASE_URL}/bookings/${userId}`);
   if (!res.ok) throw new Error('Failed to fetch bookings');
   return await res.json();
 };
@@ -60,7 +107,7 @@ export const fetchBookings = async (userId) => {
 
 // deleteBooking(id, type) where type is 'flights' or 'hotels'
 export const deleteBooking = async (id, type) => {
-  const res = await fetch(`${BASE_URL}/bookings/${type}/${id}`, {
+  const res = await authFetch(`${BASE_URL}/bookings/${type}/${id}`, {
     method: 'DELETE',
   });
   if (!res.ok) throw new Error('Failed to delete booking');
@@ -100,10 +147,33 @@ export const getWeather = async (cityName) => {
   return await res.json();
 };
 
+// cities: city names or IATA codes, e.g. every stop of an itinerary.
+// daily: one min/max/precipitation summary per day instead of 3-hourly entries.
+export const getWeatherMulti = async (cities, daily = false) => {
+  const url = new URL(`${BASE_URL}/weather/multi`);
+  cities.forEach((city) => url.searchParams.append('city', city));
+  if (daily) url.searchParams.set('daily', 'true');
+  const res = await fetch(url);
+  if (!res.ok) throw new Error('Weather fetch failed');
+  const data = await res.json();
+  return data.results;
+};
+
+// searches: [{ type: 'flight' | 'hotel' | 'weather', ...params }]
+export const searchBatch = async (searches) => {
+  const res = await fetch(`${BASE_URL}/search/batch`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ searches }),
+  });
+  if (!res.ok) throw new Error('Batch search failed');
+  return await res.json();
+};
+
 // — Book a Flight/Hotel with full details —
 
 export const bookFlight = async (user_id, flight_id) => {
-  const res = await fetch(
+  const res = await authFetch(
     `${BASE_URL}/bookings/flights/?user_id=${user_id}&flight_id=${flight_id}`,
     { method: 'POST' }
   );
@@ -112,7 +182,7 @@ export const bookFlight = async (user_id, flight_id) => {
 };
 
 export const bookHotel = async (user_id, hotel_id) => {
-  const res = await fetch(
+  const res = await authFetch(
     `${BASE_URL}/bookings/hotels/?user_id=${user_id}&hotel_id=${hotel_id}`,
     { method: 'POST' }
   );
@@ -120,6 +190,47 @@ export const bookHotel = async (user_id, hotel_id) => {
   return await res.json();
 };
 
+// — Book a search result directly by its offer_id (no createFlight/createHotel needed) —
+export const bookFlightOffer = async (user_id, offer_id) => {
+  const res = await authFetch(
+    `${BASE_URL}/bookings/flights/?user_id=${user_id}&offer_id=${offer_id}`,
+    { method: 'POST' }
+  );
+  if (!res.ok) throw new Error('Flight booking failed');
+  return res.json();
+};
+
+export const bookHotelOffer = async (user_id, offer_id) => {
+  const res = await authFetch(
+    `${BASE_URL}/bookings/hotels/?user_id=${user_id}&offer_id=${offer_id}`,
+    { method: 'POST' }
+  );
+  if (!res.ok) throw new Error('Hotel booking failed');
+  return res.json();
+};
+
+// — Book a whole trip (flight + hotel) in one request: all or nothing —
+// items: [{ type: "flight" | "hotel", offer_id }] (or { type, id } for catalog rows)
+export const bookTrip = async (user_id, items) => {
+  const res = await authFetch(`${BASE_URL}/bookings/trip`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ user_id, items }),
+  });
+  if (!res.ok) throw new Error('Trip booking failed');
+  return res.json();
+};
+
+export const cancelBookings = async (booking_ids) => {
+  const res = await authFetch(`${BASE_URL}/bookings/cancel`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ booking_ids }),
+  });
+  if (!res.ok) throw new Error('Failed to cancel bookings');
+  return res.json();
+};
+
 // — Create new flight in your DB —
 export const createFlight = async (flightData) => {
   const res = await fetch(`${BASE_URL}/flights/`, {